@@ -0,0 +1,225 @@
+"""
+End-to-end benchmark - p50/p95/p99 latency and throughput of every pipeline stage as JSON
+Usage: python benchmark.py [--frames recording.mp4] [--iterations 50] [--stages recognition,matching,...]
+                           [--llm] [--db-dir intruder_database] [--json benchmark.json]
+"""
+import io
+import os
+import sys
+import json
+import time
+import argparse
+import shutil
+import platform
+import tempfile
+from contextlib import redirect_stdout
+import cv2
+import numpy as np
+
+from config import (TRUSTED_FACES_DIR, INTRUDER_DB_DIR, FACE_TOLERANCE, FACE_INDEX_MODE,
+                    FACE_INDEX_NPROBE, FRAME_WIDTH, FRAME_HEIGHT, ENCODING_BATCH_SIZE, QUALITY_GATE_ENABLED,
+                    MIN_FACE_SIZE, MIN_FACE_SHARPNESS, FACE_EXPOSURE_RANGE, MAX_FACE_YAW, LLM_MODEL,
+                    TTS_RATE, TTS_VOLUME, SIREN_VOLUME)
+from logger import StageTimer
+
+STAGES = ("recognition", "matching", "conversation", "tts", "siren")
+INTRUDER_REPLIES = [None, "I'm a friend of the owner", "Sorry, I think I'm lost", "Get out of my way, bastard"]
+
+
+def synthetic_frames(n=8, seed=0):
+    """BGR frames of noise + a few bright blobs - detector cost without real faces"""
+    rng = np.random.default_rng(seed)
+    frames = []
+    for _ in range(n):
+        frame = rng.integers(0, 255, (FRAME_HEIGHT, FRAME_WIDTH, 3), dtype=np.uint8)
+        for _ in range(3):
+            x, y = rng.integers(0, FRAME_WIDTH - 120), rng.integers(0, FRAME_HEIGHT - 150)
+            cv2.ellipse(frame, (int(x) + 60, int(y) + 75), (50, 70), 0, 0, 360, (170, 190, 220), -1)
+        frames.append(frame)
+    return frames
+
+
+def bench_recognition(frames, iterations, preset=None, db_dir=None):
+    """FaceRecognizer.recognize_faces per frame (no tracking) + its detect / encode / match split"""
+    from face_quality import FaceQualityGate
+    from face_recognizer import FaceRecognizer
+    from presets import preset_settings, build_detector
+    from recognition_engine import LocalEngine
+    from replay import scratch_paths
+
+    settings = preset_settings(preset)
+    gate = FaceQualityGate(MIN_FACE_SIZE, MIN_FACE_SHARPNESS, FACE_EXPOSURE_RANGE, MAX_FACE_YAW) \
+        if QUALITY_GATE_ENABLED else None
+    engine = LocalEngine(gate, ENCODING_BATCH_SIZE, build_detector(settings), settings["landmark_model"],
+                         settings["num_jitters"])
+    scratch, db_dir, cache_file = scratch_paths(db_dir)  # Never the live intruder store unless asked
+    try:
+        recognizer = FaceRecognizer(TRUSTED_FACES_DIR, db_dir, FACE_TOLERANCE, cache_file=cache_file,
+                                    index_mode=FACE_INDEX_MODE, n_probe=FACE_INDEX_NPROBE, engine=engine)
+    except Exception:
+        shutil.rmtree(scratch, ignore_errors=True)
+        raise
+    try:
+        recognizer.recognize_faces(frames[0])  # Warm-up (lazy model loads)
+        timer = StageTimer()
+        engine.timer = recognizer.timer = timer
+        faces = 0
+        for i in range(iterations):
+            with timer.stage("recognition"):
+                faces += len(recognizer.recognize_faces(frames[i % len(frames)]))
+    finally:
+        recognizer.close()
+        shutil.rmtree(scratch, ignore_errors=True)
+    summary = timer.summary()
+    summary["recognition"]["faces_per_frame"] = faces / iterations
+    summary["recognition"]["gallery_size"] = len(recognizer.trusted_gallery)
+    return summary
+
+
+def bench_matching(iterations, gallery_size=1000, faces=3, seed=0):
+    """Index search of a frame's faces against a synthetic trusted gallery"""
+    from face_gallery import FaceGallery, ENCODING_DIM
+    from face_index import make_index
+
+    rng = np.random.default_rng(seed)
+    encodings = rng.normal(scale=0.6 / np.sqrt(ENCODING_DIM), size=(gallery_size, ENCODING_DIM)).astype(np.float32)
+    gallery = FaceGallery(encodings, [f"P{i // 5}" for i in range(gallery_size)], capacity=gallery_size)
+    index = make_index(FACE_INDEX_MODE, gallery, FACE_INDEX_NPROBE)
+    queries = encodings[rng.integers(0, gallery_size, (iterations, faces))]
+    queries = queries + rng.normal(scale=0.1 / np.sqrt(ENCODING_DIM), size=queries.shape).astype(np.float32)
+
+    timer = StageTimer()
+    for query in queries:
+        with timer.stage("matching"):
+            index.match(query)
+    summary = timer.summary()
+    summary["matching"].update({"gallery_size": gallery_size, "faces_per_query": faces, "index": FACE_INDEX_MODE})
+    return summary
+
+
+def bench_conversation(iterations, use_llm=False):
+    """ConversationAgent.get_response through an escalation cycle (offline = fallback replies)"""
+    from conversation_agent import ConversationAgent
+
+    agent = ConversationAgent(LLM_MODEL, offline=not use_llm)
+    timer = StageTimer()
+    with redirect_stdout(io.StringIO()):  # One line per reply - keep the report readable
+        for i in range(iterations):
+            if i % len(INTRUDER_REPLIES) == 0:
+                agent.reset()
+            with timer.stage("conversation"):
+                agent.get_response(INTRUDER_REPLIES[i % len(INTRUDER_REPLIES)])
+            agent.escalate()
+    summary = timer.summary()
+    summary["conversation"]["backend"] = LLM_MODEL if use_llm else "fallback"
+    return summary
+
+
+def bench_tts(iterations, text="Who are you? You are not recognized. Leave this room now."):
+    """TextToSpeech.synthesize to a file (no speakers)"""
+    from tts_module import TextToSpeech
+
+    tts = TextToSpeech(TTS_RATE, TTS_VOLUME)
+    out_dir = tempfile.mkdtemp()
+    timer = StageTimer()
+    for i in range(iterations):
+        path = os.path.join(out_dir, f"speech_{i}.wav")
+        with timer.stage("tts"):
+            tts.synthesize(text, path)
+    summary = timer.summary()
+    summary["tts"]["characters"] = len(text)
+    return summary
+
+
+def bench_siren(iterations, seconds=1.0):
+    """EmergencySiren.generate (the playback loop's chunk renderer) - must stay well ahead of real time"""
+    from siren import EmergencySiren
+
+    siren = EmergencySiren(SIREN_VOLUME)
+    timer = StageTimer()
+    for _ in range(iterations):
+        with timer.stage("siren"):
+            siren.generate(seconds)
+    summary = timer.summary()
+    summary["siren"]["audio_seconds"] = seconds
+    summary["siren"]["realtime_factor"] = seconds * 1000 / summary["siren"]["mean_ms"]
+    return summary
+
+
+def run_benchmark(stages=STAGES, iterations=50, frames=None, preset=None, gallery_size=1000, use_llm=False,
+                  db_dir=None):
+    """Run the selected stages → report dict; a stage that can't run here is reported as skipped"""
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "host": {"platform": platform.platform(), "python": platform.python_version(),
+                 "cpu_count": os.cpu_count(), "opencv": cv2.__version__},
+        "iterations": iterations,
+        "preset": preset or "custom",
+        "stages": {},
+        "skipped": {},
+    }
+    runs = {
+        "recognition": lambda: bench_recognition(frames or synthetic_frames(), iterations, preset, db_dir),
+        "matching": lambda: bench_matching(iterations, gallery_size),
+        "conversation": lambda: bench_conversation(iterations, use_llm),
+        "tts": lambda: bench_tts(max(1, iterations // 10)),
+        "siren": lambda: bench_siren(iterations),
+    }
+    for stage in stages:
+        print(f"⏱️ Benchmarking {stage}...")
+        try:
+            timings = runs[stage]()
+        except Exception as e:
+            print(f"⚠️ {stage} skipped: {e}")
+            report["skipped"][stage] = str(e)
+            continue
+        for name, t in sorted(timings.items(), key=lambda item: item[0] != stage):
+            t["throughput_per_s"] = t["count"] / t["total_s"] if t["total_s"] > 0 else 0.0
+            report["stages"][name if name == stage else f"{stage}.{name}"] = t
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark every stage of the guard pipeline")
+    parser.add_argument("--frames", default=None, help="Video or frame directory (default: synthetic frames)")
+    parser.add_argument("--iterations", type=int, default=50, help="Samples per stage (TTS runs a tenth)")
+    parser.add_argument("--stages", default=",".join(STAGES), help=f"Comma-separated subset of {', '.join(STAGES)}")
+    parser.add_argument("--preset", default=None, help="Performance preset for recognition")
+    parser.add_argument("--gallery-size", type=int, default=1000, help="Synthetic gallery for matching")
+    parser.add_argument("--llm", action="store_true", help="Query Ollama (default: offline fallback replies)")
+    parser.add_argument("--db-dir", default=None,
+                        help=f"Intruder database to match against, e.g. {INTRUDER_DB_DIR} (default: empty scratch database)")
+    parser.add_argument("--json", default=None, help="Write the report here (compare across versions)")
+    args = parser.parse_args()
+
+    stages = [s.strip() for s in args.stages.split(",") if s.strip()]
+    unknown = [s for s in stages if s not in STAGES]
+    if unknown:
+        print(f"❌ Unknown stage(s): {', '.join(unknown)} (choose from {', '.join(STAGES)})")
+        sys.exit(1)
+
+    frames = None
+    if args.frames:
+        from face_detectors import load_frames
+        frames = [cv2.cvtColor(f, cv2.COLOR_RGB2BGR) for f in load_frames(args.frames, 200)]
+        if not frames:
+            print(f"❌ No frames in {args.frames}")
+            sys.exit(1)
+
+    report = run_benchmark(stages, max(1, args.iterations), frames, args.preset, args.gallery_size, args.llm,
+                           args.db_dir)
+
+    print("\n" + "="*60)
+    print("BENCHMARK")
+    print("="*60)
+    for name, t in report["stages"].items():
+        print(f"{name:>26}: p50 {t['p50_ms']:8.2f}  p95 {t['p95_ms']:8.2f}  p99 {t['p99_ms']:8.2f} ms  "
+              f"{t['throughput_per_s']:8.1f}/s")
+    for stage, reason in report["skipped"].items():
+        print(f"{stage:>26}: skipped ({reason})")
+    print("="*60)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Benchmark report saved: {args.json}")
@@ -3,59 +3,226 @@ Camera management module
 """
 import cv2
 import os
-from threading import Thread, Lock
+import time
+import numpy as np
+from threading import Thread, Lock, Condition
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+PACING = ("realtime", "fast")
+
+
+class ImageSequence:
+    """Directory of frames (sorted by file name) read like a cv2.VideoCapture"""
+    
+    def __init__(self, directory, fps=30.0):
+        self.paths = sorted(os.path.join(directory, f) for f in os.listdir(directory)
+                            if f.lower().endswith(IMAGE_EXTENSIONS))
+        self.fps = fps
+        self.position = 0
+    
+    def isOpened(self):
+        return bool(self.paths)
+    
+    def read(self, image=None):
+        while self.position < len(self.paths):
+            frame = cv2.imread(self.paths[self.position])
+            self.position += 1
+            if frame is None:
+                continue  # Unreadable file - skip it
+            if image is not None and image.shape == frame.shape:
+                np.copyto(image, frame)
+                return True, image
+            return True, frame
+        return False, None
+    
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FPS:
+            return self.fps
+        if prop == cv2.CAP_PROP_FRAME_COUNT:
+            return len(self.paths)
+        return 0
+    
+    def set(self, prop, value):
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            self.position = int(value)
+            return True
+        return False
+    
+    def release(self):
+        pass
+
 
 class CameraManager:
-    """Non-blocking camera capture"""
+    """
+    Non-blocking camera capture into a preallocated ring of frame buffers.
+    Frames are read straight into the next slot; consumers get read-only
+    views tagged with a sequence number and timestamp. A view stays valid
+    for ring_size - 1 newer frames - copy it if you keep it longer.
+    
+    camera_index may also be a video file or a directory of frames (replay):
+    pacing "realtime" plays it at its recorded FPS (older frames are dropped
+    like a live camera), "fast" hands over every frame as soon as the previous
+    one has been read. Once a recording ends, finished is set (unless loop).
+    """
     
-    def __init__(self, camera_index=0, width=640, height=480):
+    def __init__(self, camera_index=0, width=640, height=480, name="camera", ring_size=4, writer=None,
+                 pacing="realtime", loop=False, fps=None):
+        if pacing not in PACING:
+            raise ValueError(f"Unknown pacing: {pacing} (choose from {', '.join(PACING)})")
         self.camera_index = camera_index
+        self.is_file = isinstance(camera_index, str)
+        self.pacing = pacing
+        self.loop = loop
+        self.fps = fps  # Replay speed (None = the file's FPS; frame directories default to 30)
+        self.finished = False  # Recording played to the end
+        self.name = name
         self.width = width
         self.height = height
+        self.ring_size = max(2, ring_size)
+        self.writer = writer  # EvidenceWriter (None = write synchronously)
         self.cap = None
-        self.frame = None
         self.running = False
         self.lock = Lock()
+        self.new_frame = Condition(self.lock)
         self.thread = None
-        print("✅ Camera manager initialized")
+        
+        self._buffers = [np.empty((height, width, 3), np.uint8) for _ in range(self.ring_size)]
+        self._seqs = [0] * self.ring_size
+        self._timestamps = [0.0] * self.ring_size
+        self._latest = -1  # Slot index of the newest frame
+        self.seq = 0  # Frames captured so far
+        self._read_seq = 0  # Newest frame handed to a consumer (fast pacing waits for it)
+        self.read_failures = 0
+        print(f"✅ Camera manager initialized ({name})")
     
     def start(self):
         """Start camera capture"""
-        self.cap = cv2.VideoCapture(self.camera_index)
-        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
-        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+        if not self.is_file:
+            self.cap = cv2.VideoCapture(self.camera_index)
+            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+        elif os.path.isdir(self.camera_index):
+            self.cap = ImageSequence(self.camera_index, self.fps or 30.0)
+        else:
+            self.cap = cv2.VideoCapture(self.camera_index)
         
         if not self.cap.isOpened():
-            raise Exception("Cannot open camera!")
+            raise Exception(f"Cannot open camera '{self.name}' (index {self.camera_index})!")
         
+        self.finished = False
         self.running = True
-        self.thread = Thread(target=self._update, daemon=True)
+        if self.is_file:
+            self.fps = self.fps or self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+        self.thread = Thread(target=self._update_file if self.is_file else self._update, daemon=True)
         self.thread.start()
-        print("📹 Camera started")
+        if self.is_file:
+            print(f"📼 Replaying {self.camera_index} ({self.name}, {self.pacing}, {self.fps:.0f} FPS)")
+        else:
+            print(f"📹 Camera started ({self.name})")
     
     def _update(self):
-        """Continuous frame capture"""
+        """Continuous frame capture - cap.read() blocks on the camera; failures back off instead of spinning"""
+        backoff = 0.01
         while self.running:
-            ret, frame = self.cap.read()
-            if ret:
-                with self.lock:
-                    self.frame = frame
+            slot = (self._latest + 1) % self.ring_size
+            ret, frame = self.cap.read(self._buffers[slot])
+            if not ret:
+                self.read_failures += 1
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 0.5)
+                continue
+            backoff = 0.01
+            self._publish(slot, frame)
     
-    def get_frame(self):
-        """Get latest frame"""
+    def _update_file(self):
+        """Replay a recording - paced to its FPS, or lock-step with the consumer"""
+        played = 0
+        play_start = time.perf_counter()
+        while self.running:
+            if self.pacing == "fast":
+                with self.new_frame:
+                    self.new_frame.wait_for(lambda: self._read_seq >= self.seq or not self.running)
+                if not self.running:
+                    break
+            
+            slot = (self._latest + 1) % self.ring_size
+            ret, frame = self.cap.read(self._buffers[slot])
+            if not ret:
+                if self.loop and played:
+                    self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                    continue
+                with self.new_frame:
+                    self.finished = True
+                    self.new_frame.notify_all()
+                print(f"📼 End of recording ({self.name}): {self.seq} frames")
+                break
+            
+            if self.pacing == "realtime":
+                delay = play_start + played / self.fps - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            played += 1
+            self._publish(slot, frame)
+    
+    def _publish(self, slot, frame):
+        with self.new_frame:
+            if frame is not self._buffers[slot]:
+                # Camera delivered another size/format - adopt it for this slot
+                self._buffers[slot] = frame
+            self.seq += 1
+            self._seqs[slot] = self.seq
+            self._timestamps[slot] = time.time()
+            self._latest = slot
+            self.new_frame.notify_all()
+    
+    def _view(self, slot):
+        view = self._buffers[slot].view()
+        view.flags.writeable = False
+        return view
+    
+    def latest(self):
+        """(seq, timestamp, read-only frame view) of the newest frame, or None"""
         with self.lock:
-            return self.frame.copy() if self.frame is not None else None
+            if self._latest < 0:
+                return None
+            return self._hand_over(self._latest)
+    
+    def wait_for_frame(self, after_seq=0, timeout=None):
+        """Block until a frame newer than after_seq arrives → (seq, timestamp, view), or None on timeout"""
+        with self.new_frame:
+            if not self.new_frame.wait_for(lambda: self.seq > after_seq or not self.running or self.finished,
+                                           timeout):
+                return None
+            if self._latest < 0 or self.seq <= after_seq:
+                return None
+            return self._hand_over(self._latest)
+    
+    def _hand_over(self, slot):
+        """Called with the lock held - marks the frame as read (fast replay may read the next one)"""
+        if self._seqs[slot] > self._read_seq:
+            self._read_seq = self._seqs[slot]
+            self.new_frame.notify_all()
+        return self._seqs[slot], self._timestamps[slot], self._view(slot)
+    
+    def get_frame(self):
+        """Get latest frame (read-only view - copy before drawing on it)"""
+        latest = self.latest()
+        return latest[2] if latest is not None else None
     
     def save_frame(self, frame, filename):
-        """Save frame to file"""
+        """Save frame to file → Future[path] when an EvidenceWriter is attached, else the path"""
+        if self.writer is not None:
+            return self.writer.submit(frame, filename)
         cv2.imwrite(filename, frame)
+        return filename
     
     def stop(self):
         """Stop camera"""
         self.running = False
+        with self.new_frame:
+            self.new_frame.notify_all()
         if self.thread:
             self.thread.join()
         if self.cap:
             self.cap.release()
-        cv2.destroyAllWindows()
-        print("🛑 Camera stopped")
+        print(f"🛑 Camera stopped ({self.name})")
@@ -6,18 +6,115 @@ Configuration for AI Room Guard
 TRUSTED_FACES_DIR = "trusted_faces"
 CAPTURES_DIR = "captures"
 INTRUDER_DB_DIR = "intruder_database"
+EMBEDDING_CACHE_FILE = "trusted_faces/.embeddings_cache.npz"  # Re-encode only new/changed photos
+WATCH_TRUSTED_FACES = True  # Enroll photos added to trusted_faces/ without restarting
+TRUSTED_FACES_POLL_INTERVAL = 2.0  # seconds
+ENROLL_MAX_DIM = 1600  # Enrollment photos are downscaled to this longest side before detection
 
 # Camera
 CAMERA_INDEX = 0
 FRAME_WIDTH = 640
 FRAME_HEIGHT = 480
+FRAME_RING_SIZE = 4  # Preallocated capture buffers per camera
+# One entry per door/room - all share one recognizer, gallery, LLM and alert system
+# Optional "roi": polygon(s) of [x, y] frame fractions - faces are only searched for inside
+# "file" instead of "index" replays a video or a directory of frames ("pacing": "realtime" or "fast")
+CAMERA_SOURCES = [
+    {"name": "room", "index": CAMERA_INDEX},
+    # {"name": "front_door", "index": 1, "roi": [[0.2, 0.0], [0.8, 0.0], [0.8, 1.0], [0.2, 1.0]]},
+    # {"name": "incident", "file": "recordings/incident_01.mp4", "pacing": "realtime"},
+]
+
+# Evidence clips - rolling JPEG pre-roll per camera, saved as .mp4 when an intruder is detected
+EVIDENCE_CLIPS = True
+EVIDENCE_FPS = 10  # Frames kept per second
+EVIDENCE_PRE_SECONDS = 10  # Before the detection
+EVIDENCE_POST_SECONDS = 10  # After the detection
+EVIDENCE_MEMORY_MB = 24  # Per camera (pre-roll + clip being recorded; a clip being written may hold as much again)
+EVIDENCE_JPEG_QUALITY = 75
+
+# Evidence photos are written by background threads (queue full → policy)
+WRITER_THREADS = 2
+WRITER_QUEUE_SIZE = 16
+WRITER_JPEG_QUALITY = 90
+WRITER_POLICY = "drop_oldest"  # "block", "drop_oldest" or "drop_newest" (intruder DB photos always block)
+
+# Headless mode - no OpenCV windows; watch and control the guard over local HTTP instead
+HEADLESS = False
+PREVIEW_SERVER = False  # Also serve the preview while the windows are open (always on when HEADLESS)
+PREVIEW_HOST = "127.0.0.1"  # Local only - the stream shows the room
+PREVIEW_PORT = 8080
+PREVIEW_JPEG_QUALITY = 80
+PREVIEW_TOKEN = ""  # Required by POST /control/... ("" = random token printed at start)
 
 # Face Recognition - STRICT SETTINGS
-FACE_RECOGNITION_INTERVAL = 2  # seconds
 UNKNOWN_THRESHOLD = 3  # detections before conversation
 FACE_TOLERANCE = 0.5  # ✅ Stricter: lower = more strict (was 0.6)
 MIN_CONFIDENCE = 0.55  # ✅ NEW: Reject if confidence < 0.55
 
+# Adaptive recognition rate (seconds between checks per camera, by room activity)
+RECOGNITION_INTERVALS = {"alert": 0.3, "active": 1.0, "idle": 2.0, "sleep": 5.0}
+RECOGNITION_CPU_BUDGETS = {"alert": 1.0, "active": 0.5, "idle": 0.25, "sleep": 0.1}  # Fraction of a core
+RECOGNITION_IDLE_AFTER = 15  # seconds without faces/motion → idle
+RECOGNITION_SLEEP_AFTER = 120  # seconds without faces/motion → sleep
+RECOGNITION_ALERT_HOLD = 10  # seconds at the alert rate after the last unknown face
+
+# Motion gating - skip face detection on a still, empty scene; detect only in changed regions
+MOTION_GATING = True
+MOTION_WIDTH = 160  # Motion detection runs on a frame this wide
+MOTION_THRESHOLD = 25  # Grey-level change counted as motion
+MOTION_MIN_AREA = 0.002  # Fraction of the frame that must change
+MOTION_RECHECK_INTERVAL = 30  # seconds - whole-frame recognition even without motion
+
+# Face tracking - faces keep a track id between ticks; the encoder re-runs only for new/stale tracks
+FACE_TRACKING = True
+TRACK_MAX_AGE = 6.0  # seconds a track survives without being seen
+TRACK_REVERIFY_INTERVAL = 5.0  # seconds before a tracked face is encoded again
+TRACK_VOTES = 5  # Recent identities voted on per track
+
+# Quality gate - faces failing these skip the encoder and count as "Unassessable", not "Unknown"
+QUALITY_GATE_ENABLED = True
+MIN_FACE_SIZE = 40  # pixels (shorter box side)
+MIN_FACE_SHARPNESS = 25.0  # Laplacian variance on a 64x64 face chip
+FACE_EXPOSURE_RANGE = (40, 220)  # Acceptable mean face brightness (0-255)
+MAX_FACE_YAW = 0.35  # Nose offset / eye distance (0 = frontal)
+
+# Gallery index
+FACE_INDEX_MODE = "exact"  # "exact" scan or "ivf" (approximate, for galleries in the thousands)
+FACE_INDEX_NPROBE = 4  # IVF clusters searched per face (higher = better recall, slower)
+
+# Recognition engine - where detection + encoding run, and how faces are batched
+RECOGNITION_ENGINE = "local"  # "local" (one core) or "process" (detection + encoding on a process pool)
+RECOGNITION_PROCESSES = None  # Pool size for "process" engine (None = all CPU cores)
+ENCODING_BATCH_SIZE = 32  # Face chips per ResNet call (faces of all pending frames are batched)
+
+# Face detector and encoder
+FACE_DETECTOR = "hog"  # "hog", "cnn", "haar" (OpenCV cascade) or "dnn" (OpenCV res10 SSD)
+DETECTION_SCALE = 1.0  # Detect on a downscaled frame (e.g. 0.5), boxes are mapped back to full size
+DETECTION_UPSAMPLE = 1  # HOG/CNN upsampling passes (0 = faster, misses small faces)
+DNN_FACE_MODEL = ("models/deploy.prototxt", "models/res10_300x300_ssd_iter_140000.caffemodel")
+DNN_CONFIDENCE = 0.6
+LANDMARK_MODEL = "small"  # Chip alignment: "small" (5 points, fast) or "large" (68 points)
+NUM_JITTERS = 1  # Encoder re-samples per face (>1 = slower, slightly more accurate)
+
+# Performance presets - set detector, encoder and recognition rate together
+# (None = use the individual settings above). Switch at runtime with keys 1/2/3.
+PERFORMANCE_PRESET = None  # "eco", "balanced" or "accurate"
+PERFORMANCE_PRESETS = {
+    "eco": {  # Raspberry Pi class
+        "detector": "hog", "upsample": 0, "scale": 0.5, "landmark_model": "small", "num_jitters": 1,
+        "intervals": {"alert": 0.5, "active": 2.0, "idle": 4.0, "sleep": 10.0},
+    },
+    "balanced": {  # Laptop (same as the defaults above)
+        "detector": "hog", "upsample": 1, "scale": 1.0, "landmark_model": "small", "num_jitters": 1,
+        "intervals": {"alert": 0.3, "active": 1.0, "idle": 2.0, "sleep": 5.0},
+    },
+    "accurate": {  # Workstation (pair with RECOGNITION_ENGINE = "process")
+        "detector": "cnn", "upsample": 1, "scale": 1.0, "landmark_model": "large", "num_jitters": 3,
+        "intervals": {"alert": 0.2, "active": 0.5, "idle": 1.0, "sleep": 3.0},
+    },
+}
+
 # Conversation
 CONVERSATION_TIMEOUT = 6
 MAX_ESCALATION_LEVEL = 3
@@ -37,6 +134,7 @@ ACTIVATION_TIMEOUT = 10
 # Siren Settings
 SIREN_DURATION = 10.0        # Seconds
 SIREN_VOLUME = 0.8          # 0.0-1.0
+ROOM_CLEAR_SECONDS = 60.0   # Room empty this long → siren stops (independent of the recognition rate)
 SIREN_PATTERN = [
     ('yelp', 3.5),  # 3.5s fast alternating
     ('wail', 4.0),  # 4.0s sweeping
@@ -7,11 +7,16 @@ import time
 class ConversationAgent:
     """Phi-3 based conversation with fallbacks"""
     
-    def __init__(self, model_name="phi3"):
+    def __init__(self, model_name="phi3", offline=False):
         self.model_name = model_name
+        self.offline = offline  # True = never contact Ollama, fallback replies only (benchmarks)
         self.escalation_level = 0
         self.max_escalation = 3
         
+        if offline:
+            print("✅ LLM Agent: offline (fallback replies)")
+            return
+        
         # Check model
         try:
             models = ollama.list()
@@ -37,7 +42,7 @@ class ConversationAgent:
                 print(f"⚠️ Hostile language! → Level {level}")
         
         # Try LLM
-        response = self._query_llm(user_input, level)
+        response = self._query_llm(user_input, level) if not self.offline else None
         
         # Fallback
         if not response:
@@ -0,0 +1,174 @@
+"""
+On-disk cache of trusted face encodings
+"""
+import hashlib
+import os
+import numpy as np
+from PIL import Image
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+
+def name_from_filename(filename):
+    """Extract name: "Jatin Gupta_sample_1.jpg" → "Jatin Gupta" """
+    name = filename.rsplit('_sample_', 1)[0]
+    name = name.rsplit('_', 1)[0]  # Also handle "Name_1.jpg"
+    name = name.rsplit('.', 1)[0]
+    return name
+
+
+def list_trusted_photos(trusted_dir):
+    """
+    [(path, name)] for every photo under trusted_dir, sorted.
+    Top-level files are named by filename ("Name_sample_1.jpg");
+    photos in sub-folders take the folder name ("Name/any.jpg").
+    """
+    photos = []
+    for root, dirs, files in os.walk(trusted_dir):
+        dirs[:] = sorted(d for d in dirs if not d.startswith('.'))
+        rel = os.path.relpath(root, trusted_dir)
+        for filename in sorted(files):
+            if filename.lower().endswith(IMAGE_EXTENSIONS):
+                name = name_from_filename(filename) if rel == '.' else rel.split(os.sep)[0]
+                photos.append((os.path.join(root, filename), name))
+    return photos
+
+
+def load_photo(path, max_dim=None):
+    """RGB uint8 array, downscaled so the longest side is at most max_dim"""
+    image = Image.open(path)
+    image = image.convert('RGB')
+    if max_dim and max(image.size) > max_dim:
+        image.thumbnail((max_dim, max_dim), Image.LANCZOS)
+    return np.array(image)
+
+
+def encode_photo(path, max_dim=None):
+    """All face encodings found in an enrollment photo"""
+    import face_recognition
+    return face_recognition.face_encodings(load_photo(path, max_dim))
+
+
+def file_digest(path, chunk_size=1 << 20):
+    """SHA-1 of a file's contents"""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class EmbeddingCache:
+    """128-D encodings stored in one .npz, keyed by path + size + mtime + content hash"""
+
+    def __init__(self, cache_file):
+        self.cache_file = cache_file
+        self.entries = {}  # path -> (size, mtime_ns, sha1, encoding or None)
+        self.by_hash = {}  # sha1 -> encoding or None (finds copied / renamed photos)
+        self.dirty = False
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    def _load(self):
+        """Read the cache file (missing or corrupt file = empty cache)"""
+        if not os.path.exists(self.cache_file):
+            return
+
+        try:
+            with np.load(self.cache_file, allow_pickle=False) as data:
+                paths = data['paths']
+                sizes = data['sizes']
+                mtimes = data['mtimes']
+                hashes = data['hashes']
+                has_face = data['has_face']
+                encodings = data['encodings']
+
+            for i, path in enumerate(paths):
+                encoding = encodings[i] if has_face[i] else None
+                self.entries[str(path)] = (int(sizes[i]), int(mtimes[i]), str(hashes[i]), encoding)
+        except Exception as e:
+            print(f"  ⚠️ Ignoring unreadable embedding cache: {e}")
+            self.entries = {}
+        self.by_hash = {entry[2]: entry[3] for entry in self.entries.values()}
+
+    def lookup(self, path):
+        """
+        Return (found, encoding) for a photo.
+        Same path, size and mtime is trusted as-is; otherwise the content
+        hash decides, so touched, copied or renamed files are not re-encoded.
+        """
+        st = os.stat(path)
+        entry = self.entries.get(path)
+        if entry is not None and st.st_size == entry[0] and st.st_mtime_ns == entry[1]:
+            self.hits += 1
+            return True, entry[3]
+
+        sha1 = file_digest(path)
+        if sha1 not in self.by_hash:
+            self.misses += 1
+            return False, None
+        encoding = self.by_hash[sha1]
+        self.entries[path] = (st.st_size, st.st_mtime_ns, sha1, encoding)
+        self.dirty = True
+        self.hits += 1
+        return True, encoding
+
+    def encoding(self, path):
+        """Cached encoding for a path (None if unknown or no face)"""
+        entry = self.entries.get(path)
+        return entry[3] if entry else None
+
+    def store(self, path, encoding):
+        """Record the encoding for a photo (None = no face found)"""
+        st = os.stat(path)
+        if encoding is not None:
+            encoding = np.asarray(encoding, dtype=np.float32)
+        sha1 = file_digest(path)
+        self.entries[path] = (st.st_size, st.st_mtime_ns, sha1, encoding)
+        self.by_hash[sha1] = encoding
+        self.dirty = True
+
+    def prune(self, live_paths):
+        """Drop entries for photos that no longer exist"""
+        live_paths = set(live_paths)
+        stale = [p for p in self.entries if p not in live_paths]
+        for path in stale:
+            del self.entries[path]
+        if stale:
+            self.by_hash = {entry[2]: entry[3] for entry in self.entries.values()}
+            self.dirty = True
+        return len(stale)
+
+    def save(self):
+        """Atomically rewrite the cache file if anything changed"""
+        if not self.dirty:
+            return
+
+        paths = sorted(self.entries)
+        n = len(paths)
+        encodings = np.zeros((n, 128), dtype=np.float32)
+        has_face = np.zeros(n, dtype=bool)
+        for i, path in enumerate(paths):
+            encoding = self.entries[path][3]
+            if encoding is not None:
+                encodings[i] = encoding
+                has_face[i] = True
+
+        cache_dir = os.path.dirname(self.cache_file)
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+        tmp_file = self.cache_file + ".tmp"
+        with open(tmp_file, 'wb') as f:
+            np.savez(
+                f,
+                paths=np.array(paths, dtype=str),
+                sizes=np.array([self.entries[p][0] for p in paths], dtype=np.int64),
+                mtimes=np.array([self.entries[p][1] for p in paths], dtype=np.int64),
+                hashes=np.array([self.entries[p][2] for p in paths], dtype=str),
+                has_face=has_face,
+                encodings=encodings
+            )
+        os.replace(tmp_file, self.cache_file)
+        self.dirty = False
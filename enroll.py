@@ -0,0 +1,90 @@
+"""
+Bulk enrollment - encode a whole trusted_faces/ tree in parallel
+Usage: python enroll.py [--dir trusted_faces] [--workers N] [--max-dim 1600] [--force]
+"""
+import os
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+from config import TRUSTED_FACES_DIR, EMBEDDING_CACHE_FILE, ENROLL_MAX_DIM
+from embedding_cache import EmbeddingCache, list_trusted_photos, encode_photo
+
+
+def _encode_job(job):
+    """Worker: (path, max_dim) → (path, encodings, error)"""
+    path, max_dim = job
+    try:
+        return path, encode_photo(path, max_dim), None
+    except Exception as e:
+        return path, [], str(e)
+
+
+def enroll(trusted_dir, cache_file, workers=None, max_dim=ENROLL_MAX_DIM, force=False):
+    """Encode new/changed photos into the embedding cache FaceRecognizer loads at startup"""
+    cache = EmbeddingCache(cache_file)
+    photos = list_trusted_photos(trusted_dir)
+    todo = [path for path, _ in photos if force or not cache.lookup(path)[0]]
+    workers = workers or os.cpu_count() or 1
+
+    print(f"📂 {len(photos)} photos in {trusted_dir}/ → {len(todo)} to encode on {workers} processes")
+
+    no_face, multi_face, failed = [], [], []
+    start = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        jobs = [(path, max_dim) for path in todo]
+        for done, (path, encodings, error) in enumerate(pool.map(_encode_job, jobs, chunksize=4), 1):
+            if error:
+                failed.append((path, error))
+                continue
+            if not encodings:
+                no_face.append(path)
+            elif len(encodings) > 1:
+                multi_face.append((path, len(encodings)))
+            cache.store(path, encodings[0] if encodings else None)
+
+            if done % 100 == 0:
+                elapsed = time.perf_counter() - start
+                print(f"  … {done}/{len(todo)} ({done / elapsed:.1f} photos/s)")
+
+    elapsed = time.perf_counter() - start
+    removed = cache.prune(path for path, _ in photos)
+    cache.save()
+
+    people = {name for path, name in photos if cache.encoding(path) is not None}
+    print("\n" + "="*60)
+    print("ENROLLMENT SUMMARY")
+    print("="*60)
+    print(f"Encoded: {len(todo)} photos in {elapsed:.1f}s "
+          f"({len(todo) / elapsed if elapsed > 0 else 0:.1f} photos/s)")
+    print(f"Enrolled: {len(people)} people | Removed stale entries: {removed}")
+
+    if no_face:
+        print(f"\n⚠️ No face found ({len(no_face)}):")
+        for path in no_face:
+            print(f"   {path}")
+    if multi_face:
+        print(f"\n⚠️ Multiple faces - first one used ({len(multi_face)}):")
+        for path, count in multi_face:
+            print(f"   {path} ({count} faces)")
+    if failed:
+        print(f"\n❌ Unreadable ({len(failed)}):")
+        for path, error in failed:
+            print(f"   {path}: {error}")
+    print("="*60)
+
+    return {"encoded": len(todo), "seconds": elapsed, "no_face": no_face,
+            "multi_face": multi_face, "failed": failed}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk-enroll trusted faces")
+    parser.add_argument("--dir", default=TRUSTED_FACES_DIR, help="Photo tree (top-level Name_1.jpg or Name/photo.jpg)")
+    parser.add_argument("--cache", default=EMBEDDING_CACHE_FILE, help="Embedding cache FaceRecognizer loads")
+    parser.add_argument("--workers", type=int, default=None, help="Processes (default: all cores)")
+    parser.add_argument("--max-dim", type=int, default=ENROLL_MAX_DIM, help="Downscale longest side before detection")
+    parser.add_argument("--force", action="store_true", help="Re-encode every photo")
+    args = parser.parse_args()
+
+    enroll(args.dir, args.cache, args.workers, args.max_dim, args.force)
@@ -0,0 +1,190 @@
+"""
+Pre-event evidence - rolling JPEG buffer flushed to a video clip when an intruder shows up
+"""
+import os
+import time
+import threading
+from collections import deque
+import cv2
+import numpy as np
+
+
+class EvidenceBuffer:
+    """
+    Keeps the last pre_seconds of a camera as JPEG frames sampled at fps.
+    add() only copies the sampled frame; a background thread encodes it.
+    trigger() moves the pre-roll into a clip that takes the next
+    post_seconds (oldest pre-roll frames give way if the budget runs out)
+    and is written to an .mp4 on another thread. Ring plus clip being
+    recorded never exceed memory_mb; a clip being written holds at most
+    another memory_mb until it is on disk.
+    """
+
+    def __init__(self, fps=10, pre_seconds=10, post_seconds=10, memory_mb=24, jpeg_quality=75, name="camera"):
+        self.fps = fps
+        self.pre_seconds = pre_seconds
+        self.post_seconds = post_seconds
+        self.budget = int(memory_mb * 1024 * 1024)
+        self.encode_params = [cv2.IMWRITE_JPEG_QUALITY, jpeg_quality]
+        self.name = name
+
+        self._frames = deque()  # (timestamp, jpeg bytes)
+        self._bytes = 0
+        self._last_sample = 0.0
+        self._clip = None  # path, pre-roll, post frames, bytes of both, end time - while recording
+        self.clips = []  # Paths of saved clips
+        self._writers = []
+        self.dropped = 0  # Samples evicted early by the memory budget or skipped by a busy encoder
+
+        self._cond = threading.Condition()
+        self._pending = None  # (timestamp, frame) handed to the encoder thread
+        self._encoding = False
+        threading.Thread(target=self._encode_loop, daemon=True).start()
+
+    @property
+    def recording(self):
+        return self._clip is not None
+
+    @property
+    def memory_bytes(self):
+        return self._bytes + (self._clip['bytes'] if self._clip else 0)
+
+    def add(self, frame, timestamp=None):
+        """Offer a camera frame - one every 1/fps seconds is copied for the encoder thread"""
+        timestamp = timestamp or time.time()
+        if timestamp - self._last_sample < 1.0 / self.fps:
+            return
+        self._last_sample = timestamp
+
+        sample = (timestamp, np.array(frame, copy=True))  # Callers pass views into the camera ring
+        with self._cond:
+            if self._pending is not None:
+                self.dropped += 1  # Encoder still busy - the newer sample wins
+            self._pending = sample
+            self._cond.notify_all()
+
+    def drain(self):
+        """Block until every frame handed over by add() is encoded"""
+        with self._cond:
+            self._cond.wait_for(lambda: self._pending is None and not self._encoding)
+
+    def _encode_loop(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending is not None)
+                (timestamp, frame), self._pending = self._pending, None
+                self._encoding = True
+            ok, jpeg = cv2.imencode('.jpg', frame, self.encode_params)
+            with self._cond:
+                if ok:
+                    self._store(timestamp, jpeg.tobytes())
+                self._encoding = False
+                self._cond.notify_all()
+
+    def _store(self, timestamp, jpeg):
+        """Called with the lock held - into the running clip, else the pre-roll ring"""
+        clip = self._clip
+        if clip is not None and timestamp <= clip['end']:
+            while clip['bytes'] + len(jpeg) > self.budget and clip['pre']:
+                _, old = clip['pre'].popleft()  # The event itself matters more than its oldest pre-roll
+                clip['bytes'] -= len(old)
+                self.dropped += 1
+            if clip['bytes'] + len(jpeg) <= self.budget:
+                clip['post'].append((timestamp, jpeg))
+                clip['bytes'] += len(jpeg)
+                return
+        if clip is not None:
+            self._flush()
+
+        self._frames.append((timestamp, jpeg))
+        self._bytes += len(jpeg)
+        while self._frames and (self._bytes > self.budget or self._frames[0][0] < timestamp - self.pre_seconds):
+            if self._bytes > self.budget:
+                self.dropped += 1
+            _, old = self._frames.popleft()
+            self._bytes -= len(old)
+
+    def trigger(self, path, now=None):
+        """Start a clip (pre-roll + next post_seconds); a repeat trigger extends the running clip"""
+        now = now or time.time()
+        with self._cond:
+            if self._clip is not None:
+                self._clip['end'] = now + self.post_seconds
+                return self._clip['path']
+            # The clip owns the pre-roll now - its bytes count once, against the clip
+            self._clip = {'path': path, 'pre': self._frames, 'post': [], 'bytes': self._bytes,
+                          'end': now + self.post_seconds}
+            pre_roll = len(self._frames)
+            self._frames, self._bytes = deque(), 0
+        print(f"🎬 Recording evidence clip ({self.name}): {pre_roll} pre-roll frames")
+        return path
+
+    def flush(self, wait=False):
+        """Write the running clip now (e.g. on shutdown); wait=True blocks until all clips are on disk"""
+        if wait:
+            self.drain()
+        with self._cond:
+            if self._clip is not None:
+                self._flush()
+        if wait:
+            for thread in self._writers:
+                thread.join()
+        self._writers = [t for t in self._writers if t.is_alive()]
+
+    def _flush(self):
+        """Called with the lock held - hand the clip to a writer thread"""
+        clip, self._clip = self._clip, None
+        frames = list(clip['pre']) + clip['post']
+        thread = threading.Thread(target=self._write, args=(clip['path'], frames), daemon=True)
+        thread.start()
+        self._writers.append(thread)
+        # Refill the pre-roll from the clip's tail (shared bytes, no copies) for the next trigger
+        if frames:
+            self._frames = deque(f for f in frames if f[0] >= frames[-1][0] - self.pre_seconds)
+            self._bytes = sum(len(jpeg) for _, jpeg in self._frames)
+            while self._bytes > self.budget:
+                _, old = self._frames.popleft()
+                self._bytes -= len(old)
+
+    def _write(self, path, frames):
+        if not frames:
+            return
+        duration = frames[-1][0] - frames[0][0]
+        fps = (len(frames) - 1) / duration if duration > 0 else self.fps
+
+        first = cv2.imdecode(np.frombuffer(frames[0][1], np.uint8), cv2.IMREAD_COLOR)
+        height, width = first.shape[:2]
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), fps, (width, height))
+        try:
+            for _, jpeg in frames:
+                frame = cv2.imdecode(np.frombuffer(jpeg, np.uint8), cv2.IMREAD_COLOR)
+                if frame.shape[:2] != (height, width):
+                    frame = cv2.resize(frame, (width, height))
+                writer.write(frame)
+        finally:
+            writer.release()
+        self.clips.append(path)
+        print(f"🎬 Evidence clip saved: {path} ({len(frames)} frames, {duration:.1f}s)")
+
+
+if __name__ == "__main__":
+    # Self-test: 60 s of synthetic frames at 30 FPS stay within budget; a trigger writes a clip
+    buffer = EvidenceBuffer(fps=10, pre_seconds=5, post_seconds=2, memory_mb=4)
+    rng = np.random.default_rng(0)
+    frame = rng.integers(0, 255, (480, 640, 3), dtype=np.uint8)
+    start = time.time()
+    for i in range(60 * 30):
+        buffer.add(frame, start + i / 30.0)
+        buffer.drain()  # Replayed faster than real time - let the encoder keep up
+    print(f"Buffered {len(buffer._frames)} frames, {buffer.memory_bytes / 1e6:.1f} MB "
+          f"(budget {buffer.budget / 1e6:.1f} MB, {buffer.dropped} evicted early)")
+
+    import tempfile
+    clip_path = os.path.join(tempfile.mkdtemp(), "evidence_test.mp4")
+    buffer.trigger(clip_path, now=start + 60)
+    for i in range(3 * 30):
+        buffer.add(frame, start + 60 + i / 30.0)
+        buffer.drain()
+        assert buffer.memory_bytes <= buffer.budget
+    buffer.flush(wait=True)
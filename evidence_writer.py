@@ -0,0 +1,156 @@
+"""
+Asynchronous evidence writer - JPEG encoding and disk I/O off the monitoring thread
+"""
+import os
+import time
+import threading
+from collections import deque
+from concurrent.futures import Future
+import cv2
+import numpy as np
+
+POLICIES = ("block", "drop_oldest", "drop_newest")
+
+
+class EvidenceWriter:
+    """
+    Bounded queue of (frame, path) jobs drained by worker threads.
+    submit() returns a Future that resolves to the written path, or to None
+    if the job was dropped. When the queue is full the policy decides:
+      block        - caller waits for space (back-pressure)
+      drop_oldest  - the oldest queued non-critical job is dropped
+      drop_newest  - the new job is dropped
+    Critical jobs (intruder database photos) are never dropped - they block.
+    """
+
+    def __init__(self, workers=2, max_queue=16, jpeg_quality=90, policy="drop_oldest"):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown writer policy: {policy} (choose from {', '.join(POLICIES)})")
+        self.max_queue = max_queue
+        self.encode_params = [cv2.IMWRITE_JPEG_QUALITY, jpeg_quality]
+        self.policy = policy
+        self._queue = deque()  # (frame, path, future, critical)
+        self._cond = threading.Condition()
+        self.running = True
+
+        # Metrics
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.blocked_ms = 0.0
+        self.write_ms = 0.0
+        self.max_depth = 0
+
+        self._threads = [threading.Thread(target=self._run, daemon=True) for _ in range(workers)]
+        for thread in self._threads:
+            thread.start()
+        print(f"💾 Evidence writer: {workers} thread(s), queue {max_queue}, {policy}")
+
+    def submit(self, frame, path, critical=False):
+        """Queue a frame to be written as JPEG → Future[path or None]"""
+        future = Future()
+        future.set_running_or_notify_cancel()
+        # Callers may pass views into the camera ring - keep our own pixels
+        job = (np.array(frame, copy=True), path, future, critical)
+
+        with self._cond:
+            start = time.perf_counter()
+            while len(self._queue) >= self.max_queue and self.running:
+                if critical or self.policy == "block":
+                    self._cond.wait()
+                elif self.policy == "drop_newest":
+                    self.dropped += 1
+                    future.set_result(None)
+                    return future
+                else:
+                    oldest = next((j for j in self._queue if not j[3]), None)
+                    if oldest is None:
+                        self._cond.wait()  # Only critical jobs queued - wait for them
+                        continue
+                    self._queue.remove(oldest)
+                    self.dropped += 1
+                    oldest[2].set_result(None)
+            self.blocked_ms += (time.perf_counter() - start) * 1000
+
+            if not self.running:
+                future.set_exception(RuntimeError("Evidence writer is closed"))
+                return future
+            self._queue.append(job)
+            self.max_depth = max(self.max_depth, len(self._queue))
+            self._cond.notify_all()
+        return future
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self.running and not self._queue:
+                    self._cond.wait()
+                if not self._queue:
+                    return
+                frame, path, future, _ = self._queue.popleft()
+                self._cond.notify_all()  # Space for blocked submitters
+
+            start = time.perf_counter()
+            try:
+                self._write(frame, path)
+            except Exception as e:
+                self.failed += 1
+                print(f"⚠️ Could not write {path}: {e}")
+                future.set_exception(e)
+                continue
+            self.write_ms += (time.perf_counter() - start) * 1000
+            self.written += 1
+            future.set_result(path)
+
+    def _write(self, frame, path):
+        ok, jpeg = cv2.imencode('.jpg', frame, self.encode_params)
+        if not ok:
+            raise IOError("JPEG encoding failed")
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(jpeg.tobytes())
+        os.replace(tmp_path, path)  # Readers never see a half-written photo
+
+    def close(self):
+        """Finish queued jobs, then stop the workers"""
+        with self._cond:
+            self.running = False
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join()
+
+    def metrics(self):
+        return {
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "max_queue_depth": self.max_depth,
+            "mean_write_ms": self.write_ms / self.written if self.written else 0.0,
+            "blocked_ms": self.blocked_ms,
+        }
+
+
+if __name__ == "__main__":
+    # Self-test: a burst larger than the queue, submit latency vs synchronous cv2.imwrite
+    import tempfile
+    out_dir = tempfile.mkdtemp()
+    frame = np.random.default_rng(0).integers(0, 255, (480, 640, 3), dtype=np.uint8)
+
+    start = time.perf_counter()
+    for i in range(20):
+        cv2.imwrite(os.path.join(out_dir, f"sync_{i}.jpg"), frame)
+    sync_ms = (time.perf_counter() - start) / 20 * 1000
+
+    writer = EvidenceWriter(workers=2, max_queue=8, policy="drop_oldest")
+    start = time.perf_counter()
+    futures = [writer.submit(frame, os.path.join(out_dir, f"async_{i}.jpg")) for i in range(40)]
+    submit_ms = (time.perf_counter() - start) / 40 * 1000
+    critical = writer.submit(frame, os.path.join(out_dir, "critical.jpg"), critical=True)
+    print(f"Critical photo: {critical.result(timeout=10)}")
+    writer.close()
+
+    saved = sum(1 for f in futures if f.result() is not None)
+    print(f"Synchronous imwrite: {sync_ms:.1f} ms/frame on the caller")
+    print(f"Async submit: {submit_ms:.2f} ms/frame on the caller, {saved}/40 written")
+    print(writer.metrics())
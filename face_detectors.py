@@ -0,0 +1,206 @@
+"""
+Face detector backends - all return face_recognition style boxes (top, right, bottom, left)
+"""
+import os
+import sys
+import time
+import cv2
+
+
+class HogDetector:
+    """dlib HOG via face_recognition (the original detector)"""
+
+    def __init__(self, upsample=1, model="hog"):
+        self.upsample = upsample
+        self.model = model  # "cnn" uses dlib's CNN detector (slow without a GPU)
+        self.name = model if upsample == 1 else f"{model}-up{upsample}"
+
+    def detect(self, rgb_frame):
+        import face_recognition
+        return face_recognition.face_locations(rgb_frame, self.upsample, self.model)
+
+
+class HaarDetector:
+    """OpenCV Haar cascade - fastest, frontal faces only, more false positives"""
+
+    name = "haar"
+
+    def __init__(self, cascade="haarcascade_frontalface_default.xml", scale_factor=1.1,
+                 min_neighbors=5, min_size=30):
+        self.cascade_path = cascade if os.path.isabs(cascade) else os.path.join(cv2.data.haarcascades, cascade)
+        self.scale_factor = scale_factor
+        self.min_neighbors = min_neighbors
+        self.min_size = min_size
+        self._cascade = None  # Loaded lazily so detectors can be sent to worker processes
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_cascade'] = None
+        return state
+
+    def detect(self, rgb_frame):
+        if self._cascade is None:
+            self._cascade = cv2.CascadeClassifier(self.cascade_path)
+            if self._cascade.empty():
+                raise FileNotFoundError(f"Haar cascade not found: {self.cascade_path}")
+        gray = cv2.cvtColor(rgb_frame, cv2.COLOR_RGB2GRAY)
+        faces = self._cascade.detectMultiScale(gray, self.scale_factor, self.min_neighbors,
+                                               minSize=(self.min_size, self.min_size))
+        return [(int(y), int(x + w), int(y + h), int(x)) for x, y, w, h in faces]
+
+
+class DnnDetector:
+    """OpenCV DNN (res10 SSD Caffe model) - robust to pose and lighting, needs the model files"""
+
+    name = "dnn"
+
+    def __init__(self, prototxt, weights, confidence=0.6, input_size=300):
+        self.prototxt = prototxt
+        self.weights = weights
+        self.confidence = confidence
+        self.input_size = input_size
+        self._net = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_net'] = None
+        return state
+
+    def detect(self, rgb_frame):
+        if self._net is None:
+            if not (os.path.exists(self.prototxt) and os.path.exists(self.weights)):
+                raise FileNotFoundError(f"DNN face model not found: {self.prototxt}, {self.weights}")
+            self._net = cv2.dnn.readNetFromCaffe(self.prototxt, self.weights)
+
+        height, width = rgb_frame.shape[:2]
+        bgr = cv2.cvtColor(cv2.resize(rgb_frame, (self.input_size, self.input_size)), cv2.COLOR_RGB2BGR)
+        blob = cv2.dnn.blobFromImage(bgr, 1.0, (self.input_size, self.input_size), (104.0, 177.0, 123.0))
+        self._net.setInput(blob)
+        detections = self._net.forward()[0, 0]
+
+        boxes = []
+        for _, _, score, x1, y1, x2, y2 in detections:
+            if score < self.confidence:
+                continue
+            left, right = int(max(0, x1 * width)), int(min(width, x2 * width))
+            top, bottom = int(max(0, y1 * height)), int(min(height, y2 * height))
+            if right > left and bottom > top:
+                boxes.append((top, right, bottom, left))
+        return boxes
+
+
+class ScaledDetector:
+    """Downscale → detect → map boxes back to full resolution"""
+
+    def __init__(self, detector, scale=0.5):
+        self.detector = detector
+        self.scale = scale
+        self.name = f"{detector.name}@{scale:g}"
+
+    def detect(self, rgb_frame):
+        if self.scale == 1.0:
+            return self.detector.detect(rgb_frame)
+        height, width = rgb_frame.shape[:2]
+        small = cv2.resize(rgb_frame, (max(1, int(width * self.scale)), max(1, int(height * self.scale))),
+                           interpolation=cv2.INTER_AREA)
+        inv = 1.0 / self.scale
+        return [(max(0, int(top * inv)), min(width, int(right * inv)),
+                 min(height, int(bottom * inv)), max(0, int(left * inv)))
+                for top, right, bottom, left in self.detector.detect(small)]
+
+
+def make_detector(name="hog", scale=1.0, upsample=1, dnn_model=None, dnn_confidence=0.6):
+    """Build the detector selected in config (FACE_DETECTOR / DETECTION_SCALE)"""
+    if name in ("hog", "cnn"):
+        detector = HogDetector(upsample, name)
+    elif name == "haar":
+        detector = HaarDetector()
+    elif name == "dnn":
+        if dnn_model is None:
+            raise ValueError("DNN detector needs dnn_model=(prototxt, weights)")
+        detector = DnnDetector(*dnn_model, confidence=dnn_confidence)
+    else:
+        raise ValueError(f"Unknown face detector: {name}")
+    return ScaledDetector(detector, scale) if scale != 1.0 else detector
+
+
+def _iou(a, b):
+    top, bottom = max(a[0], b[0]), min(a[2], b[2])
+    left, right = max(a[3], b[3]), min(a[1], b[1])
+    inter = max(0, bottom - top) * max(0, right - left)
+    area_a = (a[2] - a[0]) * (a[1] - a[3])
+    area_b = (b[2] - b[0]) * (b[1] - b[3])
+    return inter / float(area_a + area_b - inter) if inter else 0.0
+
+
+def load_frames(source, limit=200):
+    """RGB frames from a video file or a directory of images"""
+    frames = []
+    if os.path.isdir(source):
+        for filename in sorted(os.listdir(source)):
+            image = cv2.imread(os.path.join(source, filename))
+            if image is not None:
+                frames.append(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
+            if len(frames) >= limit:
+                break
+    else:
+        capture = cv2.VideoCapture(source)
+        while len(frames) < limit:
+            ret, frame = capture.read()
+            if not ret:
+                break
+            frames.append(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+        capture.release()
+    return frames
+
+
+def benchmark_detectors(frames, detectors, reference=None, iou_threshold=0.3):
+    """
+    FPS and recall of each detector; recall counts faces found by the
+    reference detector (full-resolution HOG by default) that a backend also finds.
+    """
+    reference = reference or HogDetector()
+    truth = [reference.detect(f) for f in frames]
+    n_truth = sum(len(t) for t in truth)
+    print(f"Reference {reference.name}: {n_truth} faces in {len(frames)} frames")
+
+    results = {}
+    for detector in detectors:
+        try:
+            start = time.perf_counter()
+            found = [detector.detect(f) for f in frames]
+            elapsed = time.perf_counter() - start
+        except (FileNotFoundError, ValueError) as e:
+            print(f"{detector.name:>10}: skipped ({e})")
+            continue
+
+        hits = sum(1 for boxes, refs in zip(found, truth)
+                   for ref in refs if any(_iou(ref, box) >= iou_threshold for box in boxes))
+        fps = len(frames) / elapsed if elapsed > 0 else float('inf')
+        recall = hits / n_truth if n_truth else 1.0
+        results[detector.name] = {"fps": fps, "recall": recall, "boxes": sum(len(b) for b in found)}
+        print(f"{detector.name:>10}: {fps:7.1f} FPS   recall {recall:.2f}   "
+              f"{results[detector.name]['boxes']} boxes")
+    return results
+
+
+if __name__ == "__main__":
+    # python face_detectors.py <video file | directory of frames> [max frames]
+    if len(sys.argv) < 2:
+        print("Usage: python face_detectors.py <video|frames_dir> [max_frames]")
+        sys.exit(1)
+
+    from config import DNN_FACE_MODEL, DNN_CONFIDENCE
+    frames = load_frames(sys.argv[1], int(sys.argv[2]) if len(sys.argv) > 2 else 200)
+    if not frames:
+        print(f"❌ No frames in {sys.argv[1]}")
+        sys.exit(1)
+
+    benchmark_detectors(frames, [
+        HogDetector(upsample=1),
+        HogDetector(upsample=0),
+        ScaledDetector(HogDetector(upsample=1), 0.5),
+        HaarDetector(),
+        ScaledDetector(HaarDetector(), 0.5),
+        DnnDetector(*DNN_FACE_MODEL, confidence=DNN_CONFIDENCE),
+    ])
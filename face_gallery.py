@@ -0,0 +1,98 @@
+"""
+Face gallery - contiguous encoding matrix with batched matching
+"""
+import numpy as np
+
+ENCODING_DIM = 128
+
+
+class FaceGallery:
+    """Float32 (N, 128) encoding matrix + labels, grown in place"""
+
+    def __init__(self, encodings=(), labels=(), capacity=64):
+        self._matrix = np.empty((max(capacity, 1), ENCODING_DIM), dtype=np.float32)
+        self._sq_norms = np.empty(max(capacity, 1), dtype=np.float32)
+        self._codes = np.empty(max(capacity, 1), dtype=np.int32)  # Label → int, for runner-up masking
+        self._label_codes = {}
+        self.labels = []
+        self.size = 0
+
+        for encoding, label in zip(encodings, labels):
+            self.add(encoding, label)
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def matrix(self):
+        """(N, 128) view of the live rows"""
+        return self._matrix[:self.size]
+
+    @property
+    def sq_norms(self):
+        """Squared L2 norm per live row"""
+        return self._sq_norms[:self.size]
+
+    @property
+    def codes(self):
+        """Integer label code per live row"""
+        return self._codes[:self.size]
+
+    def _grow(self, needed):
+        capacity = len(self._matrix)
+        while capacity < needed:
+            capacity *= 2
+
+        for attr in ('_matrix', '_sq_norms', '_codes'):
+            old = getattr(self, attr)
+            new = np.empty((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, attr, new)
+
+    def add(self, encoding, label):
+        """Append one encoding (amortized O(1), no list → array rebuild)"""
+        if self.size == len(self._matrix):
+            self._grow(self.size + 1)
+
+        row = np.asarray(encoding, dtype=np.float32).reshape(ENCODING_DIM)
+        self._matrix[self.size] = row
+        self._sq_norms[self.size] = np.dot(row, row)
+        self._codes[self.size] = self._label_codes.setdefault(label, len(self._label_codes))
+        self.labels.append(label)
+        self.size += 1
+        return self.size - 1
+
+    def distances(self, queries):
+        """Euclidean distances (F, N) between query encodings and the gallery"""
+        queries = np.asarray(queries, dtype=np.float32).reshape(-1, ENCODING_DIM)
+        q_sq = np.einsum('ij,ij->i', queries, queries)
+
+        # ||q - g||² = ||q||² + ||g||² - 2 q·g  → one GEMM for all faces
+        d2 = q_sq[:, None] + self._sq_norms[None, :self.size] - 2.0 * (queries @ self.matrix.T)
+        np.maximum(d2, 0.0, out=d2)
+        return np.sqrt(d2)
+
+    def match(self, queries):
+        """
+        Best match for every query face at once.
+        Returns (best_idx, best_distance, runner_up_distance) arrays of length F;
+        the runner-up is the closest entry with a *different* label (inf if none).
+        """
+        queries = np.asarray(queries, dtype=np.float32).reshape(-1, ENCODING_DIM)
+        n_faces = len(queries)
+
+        if self.size == 0 or n_faces == 0:
+            return (np.full(n_faces, -1, dtype=np.int64),
+                    np.full(n_faces, np.inf, dtype=np.float32),
+                    np.full(n_faces, np.inf, dtype=np.float32))
+
+        dist = self.distances(queries)
+        rows = np.arange(n_faces)
+        best_idx = np.argmin(dist, axis=1)
+        best_dist = dist[rows, best_idx]
+
+        codes = self.codes
+        same_label = codes[None, :] == codes[best_idx][:, None]
+        runner_up = np.where(same_label, np.inf, dist).min(axis=1)
+
+        return best_idx, best_dist, runner_up
@@ -0,0 +1,180 @@
+"""
+Nearest-neighbour indexes over a FaceGallery (exact scan or IVF clusters)
+"""
+import time
+import numpy as np
+
+from face_gallery import FaceGallery, ENCODING_DIM
+
+
+class ExactIndex:
+    """Brute-force search - every query is compared with every gallery row"""
+
+    def __init__(self, gallery=None):
+        self.gallery = gallery if gallery is not None else FaceGallery()
+
+    def __len__(self):
+        return len(self.gallery)
+
+    @property
+    def labels(self):
+        return self.gallery.labels
+
+    def add(self, encoding, label):
+        return self.gallery.add(encoding, label)
+
+    def match(self, queries):
+        return self.gallery.match(queries)
+
+
+class IVFIndex(ExactIndex):
+    """
+    Inverted-file index: k-means coarse clusters, probe the n_probe nearest
+    clusters, then exact re-ranking of their members.
+    Below min_train_size it behaves exactly like ExactIndex.
+    """
+
+    def __init__(self, gallery=None, n_probe=4, min_train_size=2000, iterations=10, seed=0):
+        super().__init__(gallery)
+        self.n_probe = n_probe
+        self.min_train_size = min_train_size
+        self.iterations = iterations
+        self.rng = np.random.default_rng(seed)
+        self.centroids = None
+        self.lists = []  # cluster → int64 array of gallery row indices
+        self.trained_size = 0
+        self._maybe_train()
+
+    def _maybe_train(self):
+        """(Re)train once the gallery reaches min_train_size, then every time it doubles"""
+        n = len(self.gallery)
+        if n >= self.min_train_size and n >= 2 * self.trained_size:
+            self.train()
+
+    def train(self):
+        """Lloyd's k-means with ~sqrt(N) clusters over the current gallery"""
+        data = self.gallery.matrix
+        n = len(data)
+        n_lists = max(1, int(np.sqrt(n)))
+
+        centroids = data[self.rng.choice(n, n_lists, replace=False)].copy()
+        for _ in range(self.iterations):
+            assign = self._nearest(data, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, data)
+            counts = np.bincount(assign, minlength=n_lists)
+            filled = counts > 0
+            centroids[filled] = sums[filled] / counts[filled, None]
+
+        assign = self._nearest(data, centroids)
+        self.centroids = centroids
+        self.lists = [np.flatnonzero(assign == c) for c in range(n_lists)]
+        self.trained_size = n
+        print(f"🗂️ IVF index trained: {n} faces → {n_lists} clusters")
+
+    @staticmethod
+    def _nearest(data, centroids, chunk=8192):
+        """Nearest centroid for every row (chunked to bound memory)"""
+        c_sq = np.einsum('ij,ij->i', centroids, centroids)
+        out = np.empty(len(data), dtype=np.int64)
+        for start in range(0, len(data), chunk):
+            block = data[start:start + chunk]
+            out[start:start + chunk] = np.argmin(c_sq[None, :] - 2.0 * (block @ centroids.T), axis=1)
+        return out
+
+    def add(self, encoding, label):
+        row = self.gallery.add(encoding, label)
+        if self.centroids is not None:
+            cluster = self._nearest(self.gallery.matrix[row:row + 1], self.centroids)[0]
+            self.lists[cluster] = np.append(self.lists[cluster], row)
+        self._maybe_train()
+        return row
+
+    def match(self, queries):
+        if self.centroids is None:
+            return self.gallery.match(queries)
+
+        queries = np.asarray(queries, dtype=np.float32).reshape(-1, ENCODING_DIM)
+        n_faces = len(queries)
+        best_idx = np.full(n_faces, -1, dtype=np.int64)
+        best_dist = np.full(n_faces, np.inf, dtype=np.float32)
+        runner_up = np.full(n_faces, np.inf, dtype=np.float32)
+
+        n_probe = min(self.n_probe, len(self.centroids))
+        c_sq = np.einsum('ij,ij->i', self.centroids, self.centroids)
+        coarse = c_sq[None, :] - 2.0 * (queries @ self.centroids.T)
+        probes = np.argpartition(coarse, n_probe - 1, axis=1)[:, :n_probe]
+
+        matrix = self.gallery.matrix
+        codes = self.gallery.codes
+        sq_norms = self.gallery.sq_norms
+        q_sq = np.einsum('ij,ij->i', queries, queries)
+        for i in range(n_faces):
+            rows = np.concatenate([self.lists[c] for c in probes[i]])
+            if len(rows) == 0:
+                continue
+
+            dist = np.sqrt(np.maximum(sq_norms[rows] - 2.0 * (matrix[rows] @ queries[i]) + q_sq[i], 0.0))
+            j = int(np.argmin(dist))
+            best_idx[i] = rows[j]
+            best_dist[i] = dist[j]
+
+            others = codes[rows] != codes[rows[j]]
+            if others.any():
+                runner_up[i] = dist[others].min()
+
+        return best_idx, best_dist, runner_up
+
+
+def make_index(mode="exact", gallery=None, n_probe=4, min_train_size=2000):
+    """Build the index selected in config (FACE_INDEX_MODE)"""
+    if mode == "exact":
+        return ExactIndex(gallery)
+    if mode == "ivf":
+        return IVFIndex(gallery, n_probe=n_probe, min_train_size=min_train_size)
+    raise ValueError(f"Unknown face index mode: {mode}")
+
+
+def benchmark_recall(n_people=10000, photos_per_person=5, n_queries=500, n_probe=4, seed=0):
+    """Recall@1 and speed of IVF against exact search on synthetic clustered encodings"""
+    rng = np.random.default_rng(seed)
+
+    # Person centres on a sphere of radius ~0.6, photos scattered ~0.15 around them
+    centres = rng.normal(size=(n_people, ENCODING_DIM)).astype(np.float32)
+    centres *= 0.6 / np.linalg.norm(centres, axis=1, keepdims=True)
+    people = np.repeat(np.arange(n_people), photos_per_person)
+    noise = rng.normal(scale=0.15 / np.sqrt(ENCODING_DIM), size=(len(people), ENCODING_DIM))
+    encodings = (centres[people] + noise).astype(np.float32)
+
+    query_people = rng.integers(0, n_people, n_queries)
+    query_noise = rng.normal(scale=0.15 / np.sqrt(ENCODING_DIM), size=(n_queries, ENCODING_DIM))
+    queries = (centres[query_people] + query_noise).astype(np.float32)
+
+    gallery = FaceGallery(encodings, [f"P{p}" for p in people], capacity=len(people))
+    exact = ExactIndex(gallery)
+    ivf = IVFIndex(gallery, n_probe=n_probe, min_train_size=1)
+
+    start = time.perf_counter()
+    exact_idx = np.concatenate([exact.match(q)[0] for q in queries])
+    exact_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    ivf_idx = np.concatenate([ivf.match(q)[0] for q in queries])
+    ivf_time = time.perf_counter() - start
+
+    return {
+        "gallery_size": len(gallery),
+        "n_probe": n_probe,
+        "recall_at_1": float(np.mean(ivf_idx == exact_idx)),
+        "exact_ms_per_query": exact_time / n_queries * 1000,
+        "ivf_ms_per_query": ivf_time / n_queries * 1000,
+    }
+
+
+if __name__ == "__main__":
+    print("Benchmarking IVF index recall against exact search...")
+    for n_probe in (1, 4, 8, 16):
+        stats = benchmark_recall(n_probe=n_probe)
+        print(f"  n_probe={n_probe:2d}: recall@1={stats['recall_at_1']:.3f} | "
+              f"exact {stats['exact_ms_per_query']:.2f} ms | ivf {stats['ivf_ms_per_query']:.2f} ms "
+              f"({stats['gallery_size']} faces)")
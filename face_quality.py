@@ -0,0 +1,103 @@
+"""
+Face quality gate - cheap checks between detection and the ResNet encoder
+"""
+import cv2
+import numpy as np
+
+CHIP_SIZE = 64  # Crops are compared at a fixed size so thresholds don't depend on distance
+
+
+class FaceQualityGate:
+    """
+    Rejects faces that can't be recognized reliably: too small, blurred,
+    badly exposed or turned too far sideways. Checks run cheapest-first and
+    all faces of a frame are scored together. The pose check works on dlib
+    landmarks; the recognition pipeline computes them once for the faces
+    passing assess_image() and hands the same shapes to assess_pose() and
+    the encoder.
+    """
+
+    def __init__(self, min_face_size=40, min_sharpness=25.0, exposure_range=(40, 220),
+                 max_yaw=0.35, check_pose=True):
+        self.min_face_size = min_face_size
+        self.min_sharpness = min_sharpness
+        self.exposure_range = exposure_range
+        self.max_yaw = max_yaw
+        self.check_pose = check_pose
+
+    def assess(self, rgb_frame, locations):
+        """One entry per box: None if the face is usable, else the rejection reason"""
+        reasons = self.assess_image(rgb_frame, locations)
+        if self.check_pose:
+            from face_recognition import api as fr_api
+            remaining = [i for i, reason in enumerate(reasons) if reason is None]
+            if remaining:
+                shapes = fr_api._raw_face_landmarks(rgb_frame, [locations[i] for i in remaining], model="small")
+                for i, reason in zip(remaining, self.assess_pose(shapes)):
+                    reasons[i] = reason
+        return reasons
+
+    def assess_image(self, rgb_frame, locations):
+        """Size, sharpness and exposure checks only - like assess() without the pose"""
+        if not locations:
+            return []
+
+        boxes = np.array(locations, dtype=np.int64).reshape(-1, 4)  # top, right, bottom, left
+        height, width = rgb_frame.shape[:2]
+        top = np.clip(boxes[:, 0], 0, height)
+        bottom = np.clip(boxes[:, 2], 0, height)
+        left = np.clip(boxes[:, 3], 0, width)
+        right = np.clip(boxes[:, 1], 0, width)
+
+        reasons = [None] * len(boxes)
+
+        # 1. Size
+        small = np.minimum(bottom - top, right - left) < self.min_face_size
+        for i in np.flatnonzero(small):
+            reasons[i] = "too_small"
+
+        candidates = np.flatnonzero(~small)
+        if len(candidates) == 0:
+            return reasons
+
+        # 2. Sharpness + exposure on fixed-size grayscale chips, all faces at once
+        gray = cv2.cvtColor(rgb_frame, cv2.COLOR_RGB2GRAY)
+        chips = np.stack([
+            cv2.resize(gray[top[i]:bottom[i], left[i]:right[i]], (CHIP_SIZE, CHIP_SIZE),
+                       interpolation=cv2.INTER_AREA)
+            for i in candidates
+        ]).astype(np.float32)
+
+        laplacian = (chips[:, :-2, 1:-1] + chips[:, 2:, 1:-1] + chips[:, 1:-1, :-2]
+                     + chips[:, 1:-1, 2:] - 4.0 * chips[:, 1:-1, 1:-1])
+        sharpness = laplacian.reshape(len(candidates), -1).var(axis=1)
+        brightness = chips.reshape(len(candidates), -1).mean(axis=1)
+
+        low, high = self.exposure_range
+        for j, i in enumerate(candidates):
+            if brightness[j] < low:
+                reasons[i] = "too_dark"
+            elif brightness[j] > high:
+                reasons[i] = "overexposed"
+            elif sharpness[j] < self.min_sharpness:
+                reasons[i] = "blurred"
+
+        return reasons
+
+    def assess_pose(self, shapes):
+        """3. Pose - one entry per dlib landmark shape: None, or "turned_away" """
+        return [None if self._yaw(shape) <= self.max_yaw else "turned_away" for shape in shapes]
+
+    @staticmethod
+    def _yaw(shape):
+        """Nose offset from the eye midpoint relative to eye distance (0 = frontal), 5- or 68-point shape"""
+        points = np.array([(p.x, p.y) for p in shape.parts()], dtype=np.float64)
+        if len(points) == 5:
+            left_eye, right_eye, nose = points[2:4].mean(axis=0), points[0:2].mean(axis=0), points[4]
+        else:
+            left_eye, right_eye, nose = points[36:42].mean(axis=0), points[42:48].mean(axis=0), \
+                points[31:36].mean(axis=0)
+        eye_distance = np.linalg.norm(right_eye - left_eye)
+        if eye_distance < 1e-3:
+            return np.inf
+        return abs(nose[0] - (left_eye[0] + right_eye[0]) / 2.0) / eye_distance
@@ -1,135 +1,334 @@
 """
 Face recognition with proper confidence thresholds
 """
-import face_recognition
 import cv2
 import os
-import pickle
+import time
+import threading
 from datetime import datetime
 import numpy as np
 
+from embedding_cache import EmbeddingCache, list_trusted_photos, encode_photo
+from face_gallery import FaceGallery
+from face_index import make_index
+from recognition_engine import LocalEngine
+from intruder_store import IntruderStore
+from trusted_watcher import TrustedFacesWatcher
+
+
+class RecognitionResult:
+    """One face from one recognition pass - shared by main loop, logger and overlay"""
+    __slots__ = ('box', 'name', 'intruder_id', 'distance', 'confidence', 'encoding', 'runner_up_distance',
+                 'quality', 'track_id', 'reused')
+    
+    def __init__(self, box, name, intruder_id, distance, encoding, runner_up_distance=None, quality=None,
+                 track_id=None, reused=False):
+        self.box = box  # (top, right, bottom, left)
+        self.name = name
+        self.intruder_id = intruder_id
+        self.distance = distance  # Best match distance (None if gallery empty)
+        self.confidence = 1.0 - distance if distance is not None else 0.0
+        self.encoding = encoding
+        self.runner_up_distance = runner_up_distance  # Closest *other* identity
+        self.quality = quality  # Rejection reason when name == "Unassessable"
+        self.track_id = track_id  # Stable per-camera face track (None without tracking)
+        self.reused = reused  # Identity taken from the track - this face was not encoded this tick
+    
+    @property
+    def is_trusted(self):
+        return self.name not in ("Unknown", "REPEAT_INTRUDER", "Unassessable")
+    
+    @property
+    def is_unknown(self):
+        """Unknown or repeat intruder (unassessable faces are neither trusted nor unknown)"""
+        return self.name in ("Unknown", "REPEAT_INTRUDER")
+    
+    def __repr__(self):
+        return f"RecognitionResult({self.name!r}, {self.intruder_id!r}, confidence={self.confidence:.2f})"
+
+
 class FaceRecognizer:
     """Face recognition with strict confidence thresholds"""
     
-    def __init__(self, trusted_dir="trusted_faces", intruder_db_dir="intruder_database", tolerance=0.5):  # ✅ Lowered to 0.5
+    def __init__(self, trusted_dir="trusted_faces", intruder_db_dir="intruder_database", tolerance=0.5,  # ✅ Lowered to 0.5
+                 cache_file=None, index_mode="exact", n_probe=4, engine=None, enroll_max_dim=1600,
+                 tracker_factory=None, writer=None, timer=None):
         self.trusted_dir = trusted_dir
+        self.cache_file = cache_file or os.path.join(trusted_dir, ".embeddings_cache.npz")
         self.intruder_db_dir = intruder_db_dir
         self.tolerance = tolerance
         self.min_confidence = 0.55  # ✅ NEW: Minimum confidence threshold (1 - distance)
+        self.engine = engine or LocalEngine()  # Where detection + encoding run
+        self.enroll_max_dim = enroll_max_dim  # Downscale huge enrollment photos before detection
+        self.quality_rejections = {}  # reason → faces skipped by the quality gate
+        self.tracker_factory = tracker_factory  # Builds one FaceTracker per camera (None = encode every face)
+        self.trackers = {}
+        self._tracks_lock = threading.Lock()
+        self.roi_masks = {}  # source → RoiMask (detection only inside the camera's polygons)
+        self.alerting = set()  # Sources whose trusted tracks must be re-encoded every tick
+        self.writer = writer  # EvidenceWriter for intruder photos (None = write synchronously)
+        self._pending_images = {}  # intruder id → Future of its photo write
+        self.timer = timer  # StageTimer for detect_encode / match / track (None = not timed)
         
         os.makedirs(trusted_dir, exist_ok=True)
         os.makedirs(intruder_db_dir, exist_ok=True)
         
-        self.known_encodings = []
-        self.known_names = []
-        self.intruder_encodings = []
-        self.intruder_ids = []
-        
-        self._load_trusted_faces()
+        self._lock = threading.Lock()  # Galleries are matched on the worker thread, grown on the main thread
+        self.embedding_cache = EmbeddingCache(self.cache_file)
+        self.watcher = None
+        self.trusted_gallery = self._build_trusted_gallery()
+        self.intruder_gallery = FaceGallery()
         self._load_intruder_database()
         
+        # Exact scan or approximate IVF search over each gallery
+        self.index_mode = index_mode
+        self.n_probe = n_probe
+        self.trusted_index = make_index(index_mode, self.trusted_gallery, n_probe)
+        self.intruder_index = make_index(index_mode, self.intruder_gallery, n_probe)
+        
         unique_names = set(self.known_names)
-        print(f"✅ Loaded {len(self.known_encodings)} photos of {len(unique_names)} people")
+        print(f"✅ Loaded {len(self.trusted_gallery)} photos of {len(unique_names)} people")
         print(f"✅ Confidence threshold: {self.min_confidence:.2f} (rejects < {self.min_confidence})")
         print(f"✅ Loaded {len(self.intruder_ids)} known intruders")
     
-    def _load_trusted_faces(self):
-        """Load all trusted face photos"""
-        for filename in os.listdir(self.trusted_dir):
-            if filename.lower().endswith(('.jpg', '.jpeg', '.png')):
-                path = os.path.join(self.trusted_dir, filename)
+    @property
+    def known_names(self):
+        return self.trusted_gallery.labels
+    
+    @property
+    def intruder_ids(self):
+        return self.intruder_gallery.labels
+    
+    def _build_trusted_gallery(self, verbose=True):
+        """Gallery of all trusted face photos (only new/changed photos are re-encoded)"""
+        cache = self.embedding_cache
+        cache.hits = cache.misses = 0
+        gallery = FaceGallery()
+        photos = list_trusted_photos(self.trusted_dir)
+        
+        for path, name in photos:
+            filename = os.path.relpath(path, self.trusted_dir)
+            try:
+                found, encoding = cache.lookup(path)
+                if not found:
+                    encodings = encode_photo(path, self.enroll_max_dim)
+                    encoding = encodings[0] if encodings else None
+                    cache.store(path, encoding)
                 
-                try:
-                    image = face_recognition.load_image_file(path)
-                    encodings = face_recognition.face_encodings(image)
-                    
-                    if encodings:
-                        # Extract name: "Jatin Gupta_sample_1.jpg" → "Jatin Gupta"
-                        name = filename.rsplit('_sample_', 1)[0]
-                        name = name.rsplit('_', 1)[0]  # Also handle "Name_1.jpg"
-                        name = name.rsplit('.', 1)[0]
-                        
-                        self.known_encodings.append(encodings[0])
-                        self.known_names.append(name)
+                if encoding is not None:
+                    gallery.add(encoding, name)
+                    if not found:
                         print(f"  ✓ Loaded: {filename} → {name}")
-                    else:
-                        print(f"  ⚠️ No face in: {filename}")
-                
-                except Exception as e:
-                    print(f"  ❌ Error: {filename}: {e}")
+                elif verbose or not found:
+                    print(f"  ⚠️ No face in: {filename}")
+            
+            except Exception as e:
+                print(f"  ❌ Error: {filename}: {e}")
+        
+        removed = cache.prune(path for path, _ in photos)
+        try:
+            cache.save()
+        except OSError as e:
+            print(f"  ⚠️ Could not write embedding cache: {e}")
+        
+        if verbose or cache.misses or removed:
+            print(f"✅ Embedding cache: {cache.hits} cached, {cache.misses} encoded, {removed} removed")
+        return gallery
+    
+    def reload_trusted_faces(self):
+        """
+        Re-scan trusted_faces/ and swap the new gallery in atomically.
+        Encoding happens outside the lock, so recognition keeps running meanwhile.
+        """
+        gallery = self._build_trusted_gallery(verbose=False)
+        index = make_index(self.index_mode, gallery, self.n_probe)
+        
+        with self._lock:
+            self.trusted_gallery = gallery
+            self.trusted_index = index
+        
+        print(f"🔄 Trusted faces updated: {len(gallery)} photos of {len(set(gallery.labels))} people")
+    
+    def start_watching(self, interval=2.0):
+        """Pick up added/changed/removed trusted photos without a restart"""
+        if self.watcher is None:
+            self.watcher = TrustedFacesWatcher(self, interval)
+            self.watcher.start()
     
     def _load_intruder_database(self):
-        """Load known intruders"""
-        db_file = os.path.join(self.intruder_db_dir, "intruders.pkl")
-        if os.path.exists(db_file):
+        """Load known intruders (append-only log, migrates intruders.pkl)"""
+        self.intruder_store = IntruderStore(self.intruder_db_dir)
+        self.intruder_gallery = FaceGallery(self.intruder_store.encodings, self.intruder_store.ids)
+    
+    def intruder_image_path(self, intruder_id, timeout=None):
+        """
+        Photo recorded for an intruder id (O(1)). If the photo is still being
+        written, waits up to timeout seconds for it (None if not on disk yet).
+        """
+        future = self._pending_images.get(intruder_id)
+        if future is not None:
             try:
-                with open(db_file, 'rb') as f:
-                    data = pickle.load(f)
-                    self.intruder_encodings = data.get('encodings', [])
-                    self.intruder_ids = data.get('ids', [])
-            except:
-                pass
-    
-    def _save_intruder_database(self):
-        """Save intruder database"""
-        db_file = os.path.join(self.intruder_db_dir, "intruders.pkl")
-        with open(db_file, 'wb') as f:
-            pickle.dump({
-                'encodings': self.intruder_encodings,
-                'ids': self.intruder_ids
-            }, f)
-    
-    def recognize_faces(self, frame):
-        """Recognize faces with strict confidence filtering"""
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        face_locations = face_recognition.face_locations(rgb_frame)
-        face_encodings = face_recognition.face_encodings(rgb_frame, face_locations)
-        
-        results = []
-        for encoding in face_encodings:
-            name, intruder_id = self._identify_face(encoding)
-            results.append((name, intruder_id, encoding))
-        
-        return results
-    
-    def _identify_face(self, encoding):
-        """Identify face with STRICT confidence check"""
-        
-        # ✅ Check trusted faces with confidence threshold
-        if self.known_encodings:
-            distances = face_recognition.face_distance(self.known_encodings, encoding)
+                if future.result(timeout=timeout) is None:
+                    return None
+            except Exception:
+                return None
+            self._pending_images.pop(intruder_id, None)
+        return self.intruder_store.image_path(intruder_id)
+    
+    def get_intruder(self, intruder_id):
+        """IntruderRecord with image path, first/last seen and sighting count"""
+        return self.intruder_store.get(intruder_id)
+    
+    def record_intruder_sighting(self, intruder_id):
+        """Update last seen / sighting count of a repeat intruder"""
+        with self._lock:
+            self.intruder_store.record_sighting(intruder_id)
+    
+    def compact_intruder_database(self):
+        """Explicit compaction of the intruder log"""
+        with self._lock:
+            self.intruder_store.compact()
+    
+    def recognize_faces(self, frame, rois=None, source=None):
+        """Detect, encode and identify every face in one pass"""
+        return self.recognize_batch([frame], [rois], [source])[0]
+    
+    def set_alert(self, source, alerting):
+        """While a camera is alerting (siren / conversation) no trusted identity is reused from a track"""
+        if alerting:
+            self.alerting.add(source)
+        else:
+            self.alerting.discard(source)
+    
+    def set_roi_mask(self, source, roi_mask):
+        """Limit face detection on one camera to its RoiMask (None = whole frame)"""
+        if roi_mask is None:
+            self.roi_masks.pop(source, None)
+        else:
+            self.roi_masks[source] = roi_mask
+    
+    def _tracker(self, source):
+        tracker = self.trackers.get(source)
+        if tracker is None:
+            tracker = self.trackers[source] = self.tracker_factory()
+        return tracker
+    
+    def recognize_batch(self, frames, rois=None, sources=None):
+        """
+        Recognize several frames (e.g. one per camera) together: detection/encoding
+        go through the engine as one batch and all faces share one matching pass.
+        rois limits detection to motion regions (one list per frame, None = whole frame).
+        With tracking, faces on a track with a fresh identity skip the encoder
+        and take the track's voted identity.
+        """
+        now = time.time()
+        rgb_frames = [cv2.cvtColor(frame, cv2.COLOR_BGR2RGB) for frame in frames]
+        trackers = None
+        skip_boxes = None
+        if self.tracker_factory is not None and sources is not None:
+            with self._tracks_lock:
+                trackers = [self._tracker(source) for source in sources]
+                skip_boxes = [tracker.reusable_boxes(now, source in self.alerting)
+                              for tracker, source in zip(trackers, sources)]
+        roi_masks = [self.roi_masks.get(source) for source in sources] if sources is not None else None
+        start = time.perf_counter()
+        detections = self.engine.detect_and_encode_many(rgb_frames, rois, skip_boxes, roi_masks)
+        encoded = time.perf_counter()
+        
+        all_encodings = [encoding for _, encodings, _ in detections for encoding in encodings
+                         if encoding is not None]
+        identities = iter(self._identify_faces(all_encodings))
+        if self.timer is not None:
+            self.timer.record("detect_encode", encoded - start)
+            self.timer.record("match", time.perf_counter() - encoded)
+        
+        batch_results = []
+        for f, (face_locations, face_encodings, quality) in enumerate(detections):
+            frame_identities = [next(identities) if encoding is not None else None for encoding in face_encodings]
+            tracks = [None] * len(face_locations)
+            if trackers is not None:
+                with self._tracks_lock:
+                    tracked = trackers[f].update(face_locations, frame_identities, face_encodings,
+                                                 [reason == "tracked" for reason in quality], now)
+                tracks = [track for track, _ in tracked]
+                frame_identities = [identity for _, identity in tracked]
             
-            if len(distances) > 0:
-                min_distance = np.min(distances)
+            results = []
+            for box, encoding, reason, identity, track in zip(face_locations, face_encodings, quality,
+                                                               frame_identities, tracks):
+                if reason not in (None, "tracked") or identity is None:
+                    # Failed the quality gate - never encoded, neither trusted nor unknown
+                    reason = reason if reason not in (None, "tracked") else "untracked"
+                    self.quality_rejections[reason] = self.quality_rejections.get(reason, 0) + 1
+                    results.append(RecognitionResult(box, "Unassessable", None, None, None, quality=reason,
+                                                     track_id=track.track_id if track else None))
+                    continue
+                name, intruder_id, distance, runner_up = identity
+                reused = encoding is None
+                if reused:
+                    encoding = track.encoding  # Skipped by the engine - reuse the track's last encoding
+                results.append(RecognitionResult(box, name, intruder_id, distance, encoding, runner_up,
+                                                 track_id=track.track_id if track else None, reused=reused))
+            batch_results.append(results)
+        
+        return batch_results
+    
+    def tracking_metrics(self):
+        """Encoder calls saved by tracking, per camera"""
+        with self._tracks_lock:
+            return {source: tracker.metrics() for source, tracker in self.trackers.items()}
+    
+    def _identify_faces(self, encodings):
+        """
+        Identify all faces of a frame with STRICT confidence check.
+        One batched index search per gallery → [(name, intruder_id, distance, runner_up)]
+        """
+        if not encodings:
+            return []
+        
+        queries = np.asarray(encodings, dtype=np.float32)
+        with self._lock:
+            trusted_idx, trusted_dist, trusted_runner = self.trusted_index.match(queries)
+            intruder_idx, intruder_dist, intruder_runner = self.intruder_index.match(queries)
+            known_names = self.known_names  # Gallery may be swapped by a live reload
+        
+        def _runner_up(distance):
+            return float(distance) if np.isfinite(distance) else None
+        
+        identities = []
+        for i in range(len(queries)):
+            best_distance = None
+            
+            # ✅ Check trusted faces with confidence threshold
+            if trusted_idx[i] >= 0:
+                min_distance = float(trusted_dist[i])
                 confidence = 1 - min_distance  # ✅ Convert distance to confidence
+                best_distance = min_distance
                 
                 # ✅ STRICT: Must pass BOTH tolerance AND confidence threshold
                 if min_distance < self.tolerance and confidence >= self.min_confidence:
-                    best_match_idx = np.argmin(distances)
-                    name = self.known_names[best_match_idx]
-                    
+                    name = known_names[trusted_idx[i]]
                     print(f"  ✓ Recognized: {name} (confidence: {confidence:.2f})")
-                    return name, None
-                else:
+                    identities.append((name, None, min_distance, _runner_up(trusted_runner[i])))
+                    continue
+                elif min_distance < self.tolerance:
                     # Log rejections for debugging
-                    if min_distance < self.tolerance:
-                        print(f"  ⚠️ Rejected: Low confidence {confidence:.2f} < {self.min_confidence:.2f}")
-        
-        # ✅ Check intruder database
-        if self.intruder_encodings:
-            distances = face_recognition.face_distance(self.intruder_encodings, encoding)
+                    print(f"  ⚠️ Rejected: Low confidence {confidence:.2f} < {self.min_confidence:.2f}")
             
-            if len(distances) > 0:
-                min_distance = np.min(distances)
+            # ✅ Check intruder database
+            if intruder_idx[i] >= 0:
+                min_distance = float(intruder_dist[i])
                 confidence = 1 - min_distance
                 
                 if min_distance < self.tolerance and confidence >= self.min_confidence:
-                    best_match_idx = np.argmin(distances)
-                    intruder_id = self.intruder_ids[best_match_idx]
+                    intruder_id = self.intruder_ids[intruder_idx[i]]
                     print(f"  🚨 REPEAT INTRUDER: {intruder_id} (confidence: {confidence:.2f})")
-                    return "REPEAT_INTRUDER", intruder_id
+                    identities.append(("REPEAT_INTRUDER", intruder_id, min_distance, _runner_up(intruder_runner[i])))
+                    continue
+            
+            identities.append(("Unknown", None, best_distance, _runner_up(trusted_runner[i])))
         
-        return "Unknown", None
+        return identities
     
     def add_intruder(self, frame, encoding):
         """Add new intruder to database"""
@@ -138,40 +337,45 @@ class FaceRecognizer:
         
         # Save image
         img_path = os.path.join(self.intruder_db_dir, f"{intruder_id}_{timestamp}.jpg")
-        cv2.imwrite(img_path, frame)
+        if self.writer is not None:
+            # Never dropped; alert code waits on it via intruder_image_path(timeout=...)
+            self._pending_images[intruder_id] = self.writer.submit(frame, img_path, critical=True)
+        else:
+            cv2.imwrite(img_path, frame)
         
-        # Add to database
-        self.intruder_encodings.append(encoding)
-        self.intruder_ids.append(intruder_id)
-        self._save_intruder_database()
+        # Add to database (in place - no gallery rebuild)
+        with self._lock:
+            self.intruder_index.add(encoding, intruder_id)
+            self.intruder_store.append(intruder_id, encoding, img_path)  # O(1) append, no full rewrite
         
         print(f"💾 New intruder: {intruder_id}")
         return intruder_id
     
+    def close(self):
+        """Release engine resources (process pool, shared memory) and stop watching"""
+        if self.watcher is not None:
+            self.watcher.stop()
+            self.watcher = None
+        self.engine.close()
+    
     def draw_results(self, frame, results):
-        """Draw boxes with confidence scores"""
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        face_locations = face_recognition.face_locations(rgb_frame)
-        
-        for (top, right, bottom, left), (name, intruder_id, encoding) in zip(face_locations, results):
-            
-            # Calculate confidence for display
-            if name != "Unknown" and self.known_encodings:
-                distances = face_recognition.face_distance(self.known_encodings, encoding)
-                confidence = 1 - np.min(distances)
-            else:
-                confidence = 0.0
+        """Draw boxes with confidence scores (no re-detection - uses result boxes)"""
+        for result in results:
+            top, right, bottom, left = result.box
             
             # Color based on recognition
-            if name == "Unknown":
+            if result.name == "Unknown":
                 color = (0, 0, 255)  # Red
                 label = "UNKNOWN"
-            elif name == "REPEAT_INTRUDER":
+            elif result.name == "Unassessable":
+                color = (0, 200, 255)  # Amber
+                label = f"? {result.quality}"
+            elif result.name == "REPEAT_INTRUDER":
                 color = (255, 0, 255)  # Magenta
-                label = f"{intruder_id}"
+                label = f"{result.intruder_id}"
             else:
                 color = (0, 255, 0)  # Green
-                label = f"{name} ({confidence:.2f})"  # ✅ Show confidence
+                label = f"{result.name} ({result.confidence:.2f})"  # ✅ Show confidence
             
             # Draw box
             cv2.rectangle(frame, (left, top), (right, bottom), color, 2)
@@ -0,0 +1,143 @@
+"""
+Face tracking between recognition ticks - the encoder only runs for new or stale tracks
+"""
+import time
+from collections import Counter, deque
+
+MIN_IOU = 0.3  # Same face on consecutive ticks (shared with the engine's skip check)
+UNTRUSTED_NAMES = ("Unknown", "REPEAT_INTRUDER", "Unassessable")
+
+
+def is_trusted(identity):
+    """(name, intruder_id) of a trusted person (not unknown / intruder / unassessable)"""
+    return identity is not None and identity[0] not in UNTRUSTED_NAMES
+
+
+def box_iou(a, b):
+    """Intersection over union of two (top, right, bottom, left) boxes"""
+    top, bottom = max(a[0], b[0]), min(a[2], b[2])
+    left, right = max(a[3], b[3]), min(a[1], b[1])
+    inter = max(0, bottom - top) * max(0, right - left)
+    if inter == 0:
+        return 0.0
+    area_a = (a[2] - a[0]) * (a[1] - a[3])
+    area_b = (b[2] - b[0]) * (b[1] - b[3])
+    return inter / float(area_a + area_b - inter)
+
+
+def match_boxes(boxes, candidates, min_iou=MIN_IOU):
+    """Greedy IoU matching → {box index: candidate index}"""
+    pairs = sorted(((box_iou(b, c), i, j) for i, b in enumerate(boxes) for j, c in enumerate(candidates)),
+                   reverse=True)
+    matched, used = {}, set()
+    for iou, i, j in pairs:
+        if iou < min_iou:
+            break
+        if i not in matched and j not in used:
+            matched[i] = j
+            used.add(j)
+    return matched
+
+
+class Track:
+    """One face followed across ticks, with a vote over its recent identities"""
+    __slots__ = ('track_id', 'box', 'votes', 'identities', 'encoding', 'last_seen', 'last_verified', 'encoded')
+
+    def __init__(self, track_id, box, now, votes=5):
+        self.track_id = track_id
+        self.box = box
+        self.votes = deque(maxlen=votes)  # (name, intruder_id) of recent encodings
+        self.identities = {}  # (name, intruder_id) → latest (distance, runner_up)
+        self.encoding = None
+        self.last_seen = now
+        self.last_verified = None
+        self.encoded = 0
+
+    def verify(self, identity, distance, runner_up, encoding, now):
+        if is_trusted(self.identity) and identity != self.identity:
+            # Someone else stepped into a trusted person's box - fail safe, the fresh encoding wins at once
+            self.votes.clear()
+        self.votes.append(identity)
+        self.identities[identity] = (distance, runner_up)
+        self.encoding = encoding
+        self.last_verified = now
+        self.encoded += 1
+
+    @property
+    def identity(self):
+        """Majority vote - ties go to the most recent identity"""
+        if not self.votes:
+            return None
+        counts = Counter(self.votes)
+        best = max(counts.values())
+        return next(v for v in reversed(self.votes) if counts[v] == best)
+
+
+class FaceTracker:
+    """
+    IoU tracker for one camera. Tracks with a recent identity hand their
+    boxes to the engine, which skips encoding faces that overlap them;
+    tracks are re-encoded every reverify_interval seconds. Trusted tracks
+    are never reused while the room is alerting or an unknown face is in
+    view - a trusted label could otherwise silence the siren.
+    """
+
+    def __init__(self, max_age=3.0, reverify_interval=5.0, votes=5):
+        self.max_age = max_age  # Drop tracks unseen this long
+        self.reverify_interval = reverify_interval
+        self.votes = votes
+        self.tracks = []
+        self._next_id = 1
+        self.encoded_faces = 0
+        self.reused_faces = 0
+
+    def reusable_boxes(self, now=None, alerting=False):
+        """Boxes of tracks whose identity is fresh enough to skip the encoder"""
+        now = now or time.time()
+        self.tracks = [t for t in self.tracks if now - t.last_seen <= self.max_age]
+        reuse_trusted = not alerting and not any(t.identity is not None and not is_trusted(t.identity)
+                                                 for t in self.tracks)
+        return [t.box for t in self.tracks
+                if t.last_verified is not None and now - t.last_verified < self.reverify_interval
+                and (reuse_trusted or not is_trusted(t.identity))]
+
+    def update(self, locations, identities, encodings, skipped, now=None):
+        """
+        Associate this tick's faces with tracks.
+        identities[i] is (name, intruder_id, distance, runner_up) for encoded faces,
+        None otherwise; skipped[i] marks faces the engine didn't encode because
+        they overlap a reusable track. Returns [(track, identity tuple or None)].
+        """
+        now = now or time.time()
+        matched = match_boxes(locations, [t.box for t in self.tracks])
+
+        out = []
+        for i, box in enumerate(locations):
+            track = self.tracks[matched[i]] if i in matched else None
+            if track is None:
+                track = Track(self._next_id, box, now, self.votes)
+                self._next_id += 1
+                self.tracks.append(track)
+            track.box = box
+            track.last_seen = now
+
+            if identities[i] is not None:
+                name, intruder_id, distance, runner_up = identities[i]
+                track.verify((name, intruder_id), distance, runner_up, encodings[i], now)
+                self.encoded_faces += 1
+            elif skipped[i]:
+                self.reused_faces += 1
+
+            identity = track.identity
+            if identity is None:
+                out.append((track, None))
+            else:
+                distance, runner_up = track.identities[identity]
+                out.append((track, (identity[0], identity[1], distance, runner_up)))
+        return out
+
+    def metrics(self):
+        total = self.encoded_faces + self.reused_faces
+        return {"tracks": len(self.tracks), "encoded_faces": self.encoded_faces,
+                "reused_faces": self.reused_faces,
+                "encoder_savings": self.reused_faces / total if total else 0.0}
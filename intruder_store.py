@@ -0,0 +1,243 @@
+"""
+Append-only intruder database (replaces rewriting intruders.pkl on every add)
+"""
+import os
+import sys
+import json
+import struct
+import pickle
+import zlib
+from datetime import datetime
+import numpy as np
+
+MAGIC = b'IRG1'
+HEADER = struct.Struct('<4sII')  # magic, payload length, crc32(payload)
+META_LEN = struct.Struct('<H')
+
+
+def _encode_record(meta, encoding):
+    meta_bytes = json.dumps(meta, separators=(',', ':')).encode('utf-8')
+    payload = META_LEN.pack(len(meta_bytes)) + meta_bytes
+    if encoding is not None:
+        payload += np.asarray(encoding, dtype=np.float32).tobytes()
+    return HEADER.pack(MAGIC, len(payload), zlib.crc32(payload)) + payload
+
+
+def _read_record(data, offset):
+    """(payload, end offset) of an intact record at offset, else None"""
+    if offset + HEADER.size > len(data):
+        return None
+    magic, length, crc = HEADER.unpack_from(data, offset)
+    start = offset + HEADER.size
+    payload = data[start:start + length]
+    if magic != MAGIC or len(payload) != length or zlib.crc32(payload) != crc:
+        return None
+    return payload, start + length
+
+
+def _decode_payload(payload):
+    (meta_len,) = META_LEN.unpack_from(payload)
+    meta = json.loads(payload[META_LEN.size:META_LEN.size + meta_len].decode('utf-8'))
+    body = payload[META_LEN.size + meta_len:]
+    encoding = np.frombuffer(body, dtype=np.float32).copy() if body else None
+    return meta, encoding
+
+
+class IntruderRecord:
+    """Metadata kept per intruder id"""
+    __slots__ = ('intruder_id', 'image_path', 'first_seen', 'last_seen', 'sightings')
+
+    def __init__(self, intruder_id, image_path=None, first_seen=None, last_seen=None, sightings=1):
+        self.intruder_id = intruder_id
+        self.image_path = image_path
+        self.first_seen = first_seen
+        self.last_seen = last_seen if last_seen is not None else first_seen
+        self.sightings = sightings
+
+    def to_meta(self):
+        return {'type': 'add', 'id': self.intruder_id, 'image': self.image_path,
+                'first_seen': self.first_seen, 'last_seen': self.last_seen,
+                'sightings': self.sightings}
+
+
+class IntruderStore:
+    """
+    Intruders as a log of checksummed records in intruders.log.
+    'add' records carry the encoding + metadata, 'sighting' records update it.
+    Adds are one O(1) append; a torn tail from a crash is truncated on startup.
+    A corrupt record with intact records after it is skipped instead: its
+    bytes go to intruders.log.corrupt and the log is rewritten without it.
+    """
+
+    def __init__(self, db_dir, filename="intruders.log", fsync=True):
+        self.db_dir = db_dir
+        self.path = os.path.join(db_dir, filename)
+        self.legacy_path = os.path.join(db_dir, "intruders.pkl")
+        self.fsync = fsync
+        self.ids = []
+        self.encodings = []
+        self.records = {}  # id → IntruderRecord (O(1) lookup)
+        self.sighting_records = 0  # Log entries that compaction would fold away
+        self._legacy_images = None  # id → photo, from one listing of db_dir (records without a stored path)
+
+        os.makedirs(db_dir, exist_ok=True)
+        if not os.path.exists(self.path) and os.path.exists(self.legacy_path):
+            self._migrate_pickle()
+        self._load()
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _load(self):
+        """Replay the log; skip corrupt records that intact ones follow, truncate a torn tail"""
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path, 'rb') as f:
+            data = f.read()
+
+        offset = 0
+        corrupt = []  # Byte ranges skipped in the middle of the log
+        while offset + HEADER.size <= len(data):
+            record = _read_record(data, offset)
+            if record is None:
+                resume = self._next_record(data, offset)
+                if resume is None:
+                    break  # Nothing intact follows - torn tail
+                corrupt.append((offset, resume))
+                offset = resume
+                continue
+            payload, offset = record
+            meta, encoding = _decode_payload(payload)
+            self._apply(meta, encoding)
+
+        if offset < len(data):
+            print(f"⚠️ Intruder log: dropping {len(data) - offset} bytes of torn tail")
+            with open(self.path, 'r+b') as f:
+                f.truncate(offset)
+        if corrupt:
+            with open(self.path + ".corrupt", 'ab') as f:
+                f.write(b''.join(data[start:end] for start, end in corrupt))
+            print(f"⚠️ Intruder log: skipped {len(corrupt)} corrupt record(s) "
+                  f"({sum(end - start for start, end in corrupt)} bytes saved to {self.path}.corrupt)")
+            self.compact()
+
+    @staticmethod
+    def _next_record(data, offset):
+        """Offset of the next intact record after a corrupt one - its length prefix first, else the next magic"""
+        if offset + HEADER.size <= len(data):
+            magic, length, _ = HEADER.unpack_from(data, offset)
+            end = offset + HEADER.size + length
+            if magic == MAGIC and end < len(data) and _read_record(data, end) is not None:
+                return end
+        candidate = data.find(MAGIC, offset + 1)
+        while candidate >= 0:
+            if _read_record(data, candidate) is not None:
+                return candidate
+            candidate = data.find(MAGIC, candidate + 1)
+        return None
+
+    def _apply(self, meta, encoding):
+        intruder_id = meta['id']
+
+        if meta.get('type') == 'sighting':
+            record = self.records.get(intruder_id)
+            if record is not None:
+                record.last_seen = meta['time']
+                record.sightings += 1
+            self.sighting_records += 1
+            return
+
+        self.ids.append(intruder_id)
+        self.encodings.append(encoding)
+        self.records[intruder_id] = IntruderRecord(
+            intruder_id, meta.get('image'), meta.get('first_seen'),
+            meta.get('last_seen'), meta.get('sightings', 1)
+        )
+
+    def _write(self, records, mode='ab', path=None):
+        with open(path or self.path, mode) as f:
+            f.write(b''.join(records))
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+
+    def append(self, intruder_id, encoding, image_path=None, seen_at=None):
+        """Durably add one intruder - cost does not depend on database size"""
+        seen_at = seen_at or datetime.now().isoformat(timespec='seconds')
+        meta = IntruderRecord(intruder_id, image_path, seen_at).to_meta()
+        self._write([_encode_record(meta, encoding)])
+        self._apply(meta, np.asarray(encoding, dtype=np.float32))
+
+    def record_sighting(self, intruder_id, seen_at=None):
+        """Log a repeat sighting (small metadata-only record)"""
+        if intruder_id not in self.records:
+            return
+        meta = {'type': 'sighting', 'id': intruder_id,
+                'time': seen_at or datetime.now().isoformat(timespec='seconds')}
+        self._write([_encode_record(meta, None)])
+        self._apply(meta, None)
+
+    def get(self, intruder_id):
+        """IntruderRecord for an id (or None)"""
+        return self.records.get(intruder_id)
+
+    def image_path(self, intruder_id):
+        """Evidence photo of an intruder - O(1), no directory scan"""
+        record = self.records.get(intruder_id)
+        if record is None:
+            return None
+        if record.image_path is None:
+            # Records written before paths were stored: one directory listing, then dict lookups (hits and misses)
+            return self._find_legacy_image(intruder_id)
+        return record.image_path
+
+    def compact(self):
+        """Rewrite the log with one record per intruder, sightings folded in (atomic replace)"""
+        records = [_encode_record(self.records[i].to_meta(), e) for i, e in zip(self.ids, self.encodings)]
+        tmp_path = self.path + ".tmp"
+        self._write(records, mode='wb', path=tmp_path)
+        os.replace(tmp_path, self.path)
+        self.sighting_records = 0
+        print(f"🗜️ Intruder log compacted: {len(records)} records")
+
+    def _migrate_pickle(self):
+        """One-time import of the old intruders.pkl"""
+        try:
+            with open(self.legacy_path, 'rb') as f:
+                data = pickle.load(f)
+        except Exception as e:
+            print(f"⚠️ Could not read {self.legacy_path}: {e}")
+            return
+
+        ids = data.get('ids', [])
+        encodings = data.get('encodings', [])
+        records = [_encode_record(IntruderRecord(i, self._find_legacy_image(i)).to_meta(), e)
+                   for i, e in zip(ids, encodings)]
+        tmp_path = self.path + ".tmp"
+        self._write(records, mode='wb', path=tmp_path)
+        os.replace(tmp_path, self.path)
+        os.replace(self.legacy_path, self.legacy_path + ".migrated")
+        print(f"✅ Migrated {len(ids)} intruders from intruders.pkl")
+
+    def _find_legacy_image(self, intruder_id):
+        """Old databases didn't record photo paths - INTRUDER_XXX_*.jpg from a single listing of db_dir"""
+        if self._legacy_images is None:
+            self._legacy_images = {}
+            for filename in sorted(os.listdir(self.db_dir)):
+                if not filename.endswith('.jpg'):
+                    continue
+                # Any prefix ending before an underscore may be the id (ids contain underscores themselves)
+                for end in (i for i, c in enumerate(filename) if c == '_'):
+                    self._legacy_images.setdefault(filename[:end], os.path.join(self.db_dir, filename))
+        return self._legacy_images.get(intruder_id)
+
+
+if __name__ == "__main__":
+    # python intruder_store.py compact [intruder_database]
+    if len(sys.argv) >= 2 and sys.argv[1] == "compact":
+        from config import INTRUDER_DB_DIR
+        store = IntruderStore(sys.argv[2] if len(sys.argv) > 2 else INTRUDER_DB_DIR)
+        store.compact()
+    else:
+        print("Usage: python intruder_store.py compact [db_dir]")
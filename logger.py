@@ -3,8 +3,79 @@ Performance logging for grading evidence
 """
 import json
 import time
+import threading
+from collections import deque
+from contextlib import contextmanager
 from datetime import datetime
 
+
+def percentile(sorted_values, q):
+    """q-th percentile (0-100) of an already sorted list, nearest rank"""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(round(q / 100.0 * (len(sorted_values) - 1))))]
+
+
+def format_metric(key, value):
+    """Ratios as percentages, milliseconds and counts whole (unless tiny), other floats with 2 decimals"""
+    if not isinstance(value, float):
+        return str(value)
+    if key.endswith(("savings", "ratio", "fraction")):
+        return f"{value * 100:.1f}%"
+    if key.endswith("_ms") and abs(value) >= 10:
+        return f"{value:.0f}"
+    return f"{value:.2f}"
+
+
+class StageTimer:
+    """
+    Wall time per pipeline stage (motion, detect, encode, match, ...).
+    Thread-safe - the main loop and the recognition worker share one.
+    Percentiles use the last `window` samples of a stage, totals the whole run.
+    """
+    
+    def __init__(self, window=10000):
+        self.window = window
+        self._samples = {}
+        self._totals = {}  # stage → [count, seconds]
+        self._lock = threading.Lock()
+    
+    def record(self, stage, seconds):
+        with self._lock:
+            if stage not in self._samples:
+                self._samples[stage] = deque(maxlen=self.window)
+                self._totals[stage] = [0, 0.0]
+            self._samples[stage].append(seconds)
+            self._totals[stage][0] += 1
+            self._totals[stage][1] += seconds
+    
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+    
+    def summary(self):
+        """stage → count, total_s, mean/p50/p95/p99/max in ms"""
+        with self._lock:
+            snapshot = {stage: (sorted(samples), list(self._totals[stage]))
+                        for stage, samples in self._samples.items()}
+        summary = {}
+        for stage, (samples, (count, total)) in snapshot.items():
+            summary[stage] = {
+                "count": count,
+                "total_s": total,
+                "mean_ms": total / count * 1000,
+                "p50_ms": percentile(samples, 50) * 1000,
+                "p95_ms": percentile(samples, 95) * 1000,
+                "p99_ms": percentile(samples, 99) * 1000,
+                "max_ms": samples[-1] * 1000,
+            }
+        return summary
+
+
 class PerformanceLogger:
     def __init__(self, log_file="performance_log.json"):
         self.log_file = log_file
@@ -19,12 +90,17 @@ class PerformanceLogger:
             "confidence": confidence
         })
     
-    def log_recognition(self, name, confidence, correct=None):
+    def log_recognition(self, result, correct=None):
+        """Log a RecognitionResult (no re-computation of distances)"""
         self.logs.append({
             "timestamp": datetime.now().isoformat(),
             "type": "face_recognition",
-            "name": name,
-            "confidence": confidence,
+            "name": result.name,
+            "intruder_id": result.intruder_id,
+            "confidence": result.confidence,
+            "distance": result.distance,
+            "runner_up_distance": result.runner_up_distance,
+            "track_id": result.track_id,
             "correct": correct
         })
     
@@ -37,6 +113,28 @@ class PerformanceLogger:
             "guard_response": guard_response
         })
     
+    def log_metrics(self, component, metrics):
+        """Log a latency/throughput summary (e.g. recognition worker)"""
+        self.logs.append({
+            "timestamp": datetime.now().isoformat(),
+            "type": "metrics",
+            "component": component,
+            **metrics
+        })
+    
+    def log_schedule(self, source, old_mode, new_mode, reason, interval, compute_time=None):
+        """Log a recognition scheduler decision (mode change)"""
+        self.logs.append({
+            "timestamp": datetime.now().isoformat(),
+            "type": "schedule",
+            "source": source,
+            "from": old_mode,
+            "to": new_mode,
+            "reason": reason,
+            "interval": interval,
+            "compute_time": compute_time
+        })
+    
     def save(self):
         with open(self.log_file, 'w') as f:
             json.dump(self.logs, f, indent=2)
@@ -46,6 +144,7 @@ class PerformanceLogger:
         activations = [l for l in self.logs if l['type'] == 'activation']
         recognitions = [l for l in self.logs if l['type'] == 'face_recognition']
         conversations = [l for l in self.logs if l['type'] == 'conversation']
+        metrics = [l for l in self.logs if l['type'] == 'metrics']
         
         print("\n" + "="*60)
         print("PERFORMANCE STATISTICS")
@@ -64,4 +163,9 @@ class PerformanceLogger:
             levels = [l['escalation_level'] for l in conversations]
             print(f"Escalation Levels Used: {set(levels)}")
         
+        for m in metrics:
+            timings = ", ".join(f"{k}={format_metric(k, v)}"
+                                for k, v in m.items() if k not in ("timestamp", "type", "component"))
+            print(f"{m['component'].capitalize()} Metrics: {timings}")
+        
         print("="*60)
@@ -2,12 +2,12 @@
 AI Room Guard - Main System (PRODUCTION VERSION)
 """
 import time
+import signal
 import threading
-from queue import Queue
+from queue import Queue, SimpleQueue
 import datetime
 import cv2
 import os
-import face_recognition
 
 from config import *
 from tts_module import TextToSpeech
@@ -15,11 +15,22 @@ from speech_listener import SpeechListener
 from conversation_agent import ConversationAgent
 from face_recognizer import FaceRecognizer
 from camera_manager import CameraManager
-from state_manager import StateManager
+from state_manager import StateManager, RoomState
 from guard_activator import GuardActivator
-from logger import PerformanceLogger
+from logger import PerformanceLogger, StageTimer
 from siren import EmergencySiren
 from alerts import AlertSystem
+from recognition_worker import RecognitionWorker
+from recognition_scheduler import RecognitionScheduler
+from recognition_engine import make_engine
+from face_quality import FaceQualityGate
+from presets import preset_settings, build_detector, apply_preset
+from motion_detector import MotionDetector
+from face_tracker import FaceTracker
+from roi_mask import RoiMask
+from evidence_buffer import EvidenceBuffer
+from evidence_writer import EvidenceWriter
+from preview_server import PreviewServer
 
 
 class AIRoomGuard:
@@ -31,14 +42,50 @@ class AIRoomGuard:
         print("="*60)
         
         self.activator = GuardActivator(ACTIVATION_PHRASE)
-        self.camera = CameraManager(CAMERA_INDEX, FRAME_WIDTH, FRAME_HEIGHT)
+        self.writer = EvidenceWriter(WRITER_THREADS, WRITER_QUEUE_SIZE, WRITER_JPEG_QUALITY, WRITER_POLICY)
+        self.stages = StageTimer()  # Per-stage wall time of the pipeline
+        self.rooms = [
+            RoomState(
+                source["name"],
+                CameraManager(source.get("file", source.get("index", 0)), FRAME_WIDTH, FRAME_HEIGHT,
+                              name=source["name"], ring_size=FRAME_RING_SIZE, writer=self.writer,
+                              pacing=source.get("pacing", "realtime"), loop=source.get("loop", False)),
+                window_name='AI Room Guard' if len(CAMERA_SOURCES) == 1 else None,
+                motion=MotionDetector(MOTION_WIDTH, MOTION_THRESHOLD, min_area=MOTION_MIN_AREA)
+                if MOTION_GATING else None,
+                roi_mask=RoiMask(source["roi"]) if source.get("roi") else None,
+                evidence=EvidenceBuffer(EVIDENCE_FPS, EVIDENCE_PRE_SECONDS, EVIDENCE_POST_SECONDS,
+                                        EVIDENCE_MEMORY_MB, EVIDENCE_JPEG_QUALITY, source["name"])
+                if EVIDENCE_CLIPS else None
+            )
+            for source in CAMERA_SOURCES
+        ]
         self.state = StateManager()
-        self.recognizer = FaceRecognizer(TRUSTED_FACES_DIR, INTRUDER_DB_DIR, FACE_TOLERANCE)
+        self.preset = PERFORMANCE_PRESET
+        settings = preset_settings(self.preset)
+        self.recognizer = FaceRecognizer(TRUSTED_FACES_DIR, INTRUDER_DB_DIR, FACE_TOLERANCE,
+                                         cache_file=EMBEDDING_CACHE_FILE,
+                                         index_mode=FACE_INDEX_MODE, n_probe=FACE_INDEX_NPROBE,
+                                         enroll_max_dim=ENROLL_MAX_DIM,
+                                         tracker_factory=self._make_tracker if FACE_TRACKING else None,
+                                         writer=self.writer, timer=self.stages,
+                                         engine=make_engine(RECOGNITION_ENGINE, RECOGNITION_PROCESSES,
+                                                            (FRAME_HEIGHT, FRAME_WIDTH, 3),
+                                                            self._make_quality_gate(), ENCODING_BATCH_SIZE,
+                                                            build_detector(settings),
+                                                            settings["landmark_model"], settings["num_jitters"],
+                                                            self.stages))
+        for room in self.rooms:
+            self.recognizer.set_roi_mask(room.name, room.roi_mask)
         self.tts = TextToSpeech(TTS_RATE, TTS_VOLUME)
         self.listener = SpeechListener()
         self.agent = ConversationAgent(LLM_MODEL)
         self.logger = PerformanceLogger()
         self.siren = EmergencySiren(SIREN_VOLUME)
+        self.recognition_worker = RecognitionWorker(self.recognizer)
+        self.scheduler = RecognitionScheduler(dict(settings["intervals"]), RECOGNITION_CPU_BUDGETS,
+                                              RECOGNITION_IDLE_AFTER, RECOGNITION_SLEEP_AFTER,
+                                              RECOGNITION_ALERT_HOLD, logger=self.logger)
         
         if ALERTS_ENABLED:
             self.alert_system = AlertSystem()
@@ -51,12 +98,33 @@ class AIRoomGuard:
         self.speaking = False
         self.listening = False
         self.last_greeted = {}
+        self.alerted_intruders = set()
+        self.conversation_room = None  # Room whose intruder the guard is talking to
         self.conversation_lock = threading.Lock()
         self.start_time = time.time()
         
+        # Controls - keys, preview server and signals all end up here
+        self.commands = SimpleQueue()  # put() is safe from signal handlers
+        self.preview = None
+        if HEADLESS or PREVIEW_SERVER:
+            self.preview = PreviewServer(PREVIEW_HOST, PREVIEW_PORT, PREVIEW_JPEG_QUALITY,
+                                         status=self.status, on_command=self.commands.put,
+                                         token=PREVIEW_TOKEN or None)
+        
         print("✅ ALL SYSTEMS READY!")
         print("="*60)
     
+    @staticmethod
+    def _make_tracker():
+        return FaceTracker(TRACK_MAX_AGE, TRACK_REVERIFY_INTERVAL, TRACK_VOTES)
+    
+    @staticmethod
+    def _make_quality_gate():
+        """Quality gate from config (None = encode every detected face)"""
+        if not QUALITY_GATE_ENABLED:
+            return None
+        return FaceQualityGate(MIN_FACE_SIZE, MIN_FACE_SHARPNESS, FACE_EXPOSURE_RANGE, MAX_FACE_YAW)
+    
     def wait_for_activation(self):
         """Wait for voice activation"""
         print("\n" + "="*60)
@@ -154,284 +222,109 @@ class AIRoomGuard:
         thread.start()
     
     def monitor_room(self):
-        """Main monitoring loop"""
+        """Main monitoring loop (all cameras)"""
         print("\n" + "="*60)
-        print("👁️  MONITORING ROOM")
+        print(f"👁️  MONITORING {len(self.rooms)} ROOM(S): {', '.join(r.name for r in self.rooms)}")
         print("="*60)
-        print("Press 'q' to quit | 'd' to deactivate\n")
+        if HEADLESS:
+            print(f"Headless: POST /control/quit | deactivate | eco | balanced | accurate "
+                  f"on port {PREVIEW_PORT}, or SIGTERM to quit\n")
+        else:
+            print("Press 'q' to quit | 'd' to deactivate | '1'/'2'/'3' eco/balanced/accurate\n")
         
-        self.camera.start()
+        self._install_signal_handlers()
+        if self.preview is not None:
+            self.preview.start()
+        for room in self.rooms:
+            room.camera.start()
+        self.recognition_worker.start()
+        if WATCH_TRUSTED_FACES:
+            self.recognizer.start_watching(TRUSTED_FACES_POLL_INTERVAL)
         time.sleep(1)
         
-        # State variables
-        unknown_count = 0
-        last_check_time = time.time()
-        in_conversation = False
-        waiting_for_response = False
-        intruder_encoding = None
-        intruder_added = False
-        consecutive_unknown = 0
-        siren_active = False
-        frames_since_clear = 0
-        alerted_intruders = set()
-        current_intruder_id = None
-        
         try:
             while self.state.guard_active:
-                frame = self.camera.get_frame()
-                if frame is None:
-                    time.sleep(0.1)
-                    continue
+                got_frame = False
                 
-                current_time = time.time()
-                
-                # FACE RECOGNITION (always check, even during conversation)
-                if (current_time - last_check_time >= FACE_RECOGNITION_INTERVAL):
-                    
-                    rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                    face_locations = face_recognition.face_locations(rgb_frame)
-                    face_encodings = face_recognition.face_encodings(rgb_frame, face_locations)
-                    
-                    results = []
-                    for encoding in face_encodings:
-                        name, intruder_id = self.recognizer._identify_face(encoding)
-                        if name != "Unknown":
-                            if self.recognizer.known_encodings:
-                                distances = face_recognition.face_distance(self.recognizer.known_encodings, encoding)
-                                confidence = 1 - min(distances) if len(distances) > 0 else 0.0
-                                self.logger.log_recognition(name=name, confidence=confidence, correct=True)
-                        results.append((name, intruder_id, encoding))
+                for room in self.rooms:
+                    latest = room.camera.latest()
+                    if latest is None or latest[0] == room.camera_seq:
+                        continue  # Nothing new from this camera - don't redo the same frame
+                    got_frame = True
+                    room.camera_seq, _, frame = latest  # Read-only view into the camera's ring
+                    room.frame = frame  # Only valid until the camera wraps the ring - copy before keeping it
+                    # Own pixels for the overlay: a conversation pause below outlasts the ring slot
+                    display_frame = frame.copy()
+                    room.tick()
                     
-                    has_unknown = any(name in ["Unknown", "REPEAT_INTRUDER"] for name, _, _ in results)
-                    has_known = any(name not in ["Unknown", "REPEAT_INTRUDER"] for name, _, _ in results)
+                    current_time = time.time()
                     
-                    # PRIORITY 1: Stop siren if trusted person detected
-                    if siren_active and has_known:
-                        print("\n✅ TRUSTED PERSON DETECTED - STOPPING SIREN\n")
-                        self.siren.stop()
-                        siren_active = False
-                        
-                        for name, _, _ in results:
-                            if name not in ["Unknown", "REPEAT_INTRUDER"]:
-                                self.speak_async(f"Welcome {name}! Alarm deactivated.")
-                        
-                        # Reset all state
-                        in_conversation = False
-                        waiting_for_response = False
-                        unknown_count = 0
-                        consecutive_unknown = 0
-                        intruder_encoding = None
-                        intruder_added = False
-                        current_intruder_id = None
-                        self.agent.reset()
-                        self.state.end_conversation()
-                        last_check_time = current_time
-                        continue
+                    if room.evidence is not None:
+                        with self.stages.stage("evidence"):
+                            room.evidence.add(frame, current_time)
                     
-                    # PRIORITY 2: Stop siren if room clear
-                    if siren_active and not has_unknown and not has_known:
-                        frames_since_clear += 1
-                        if frames_since_clear >= 30:
-                            print("\n✅ ROOM CLEAR - STOPPING SIREN\n")
-                            self.siren.stop()
-                            siren_active = False
-                            self.speak_async("Intruder has left. Alarm Deactivated")
-                            
-                            # Reset all state
-                            in_conversation = False
-                            waiting_for_response = False
-                            unknown_count = 0
-                            consecutive_unknown = 0
-                            intruder_encoding = None
-                            intruder_added = False
-                            current_intruder_id = None
-                            frames_since_clear = 0
-                            self.agent.reset()
-                            self.state.end_conversation()
-                            last_check_time = current_time
-                            continue
-                    else:
-                        frames_since_clear = 0
+                    # MOTION (cheap, every frame)
+                    motion = None
+                    if room.motion is not None:
+                        with self.stages.stage("motion"):
+                            motion = room.motion.detect(frame, room.roi_mask)
+                    if motion is not None and motion.moving:
+                        self.scheduler.note_motion(room.name, current_time)
                     
-                    # NEW DETECTIONS (only if not in conversation)
-                    if not in_conversation and not self.speaking and not self.listening:
-                        
-                        # Greet known people
-                        if has_known and not siren_active:
-                            for name, _, _ in results:
-                                if name not in ["Unknown", "REPEAT_INTRUDER"]:
-                                    self.greet_known_person(name)
-                            
-                            if unknown_count > 0:
-                                print("✅ Trusted person. Resetting.")
-                                unknown_count = 0
-                                consecutive_unknown = 0
-                                intruder_encoding = None
-                        
-                        # Handle unknowns
-                        if has_unknown and not has_known and not siren_active:
-                            consecutive_unknown += 1
-                            
-                            if consecutive_unknown >= 2:
-                                unknown_count += 1
-                                consecutive_unknown = 0
-                                print(f"⚠️ Unknown person! ({unknown_count}/{UNKNOWN_THRESHOLD})")
-                                
-                                os.makedirs(CAPTURES_DIR, exist_ok=True)
-                                timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-                                
-                                current_intruder_id = None
-                                is_repeat_intruder = False
-                                
-                                for name, intruder_id, encoding in results:
-                                    if name == "REPEAT_INTRUDER":
-                                        print(f"🚨 KNOWN INTRUDER: {intruder_id}")
-                                        current_intruder_id = intruder_id
-                                        is_repeat_intruder = True
-                                        
-                                        if self.alert_system and intruder_id not in alerted_intruders:
-                                            intruder_image_path = None
-                                            for filename in os.listdir(INTRUDER_DB_DIR):
-                                                if intruder_id in filename and filename.endswith('.jpg'):
-                                                    intruder_image_path = os.path.join(INTRUDER_DB_DIR, filename)
-                                                    break
-                                            
-                                            if intruder_image_path:
-                                                print(f"\n🚨 REPEAT INTRUDER ALERT: {intruder_id}")
-                                                print("📨 Sending immediate alert...")
-                                                
-                                                alert_thread = threading.Thread(
-                                                    target=self.alert_system.send_repeat_intruder_alert,
-                                                    args=(intruder_id, intruder_image_path),
-                                                    daemon=True
-                                                )
-                                                alert_thread.start()
-                                                alerted_intruders.add(intruder_id)
-                                        
-                                        self.speak_async(f"Alert! Known intruder {intruder_id} detected!")
-                                        self.agent.escalation_level = 2
-                                    
-                                    elif name == "Unknown":
-                                        intruder_encoding = encoding
-                                
-                                filepath = os.path.join(CAPTURES_DIR, f"intruder_{timestamp}.jpg")
-                                self.camera.save_frame(frame, filepath)
-                                
-                                if unknown_count >= UNKNOWN_THRESHOLD:
-                                    self.state.detect_intruder()
-                                    self.state.start_conversation()
-                                    in_conversation = True
-                                    waiting_for_response = True
-                                    
-                                    print("\n💬 STARTING CONVERSATION\n")
-                                    if is_repeat_intruder:
-                                        print(f"⚠️ Starting at Level {self.agent.escalation_level}")
-                                    
-                                    time.sleep(0.5)
-                                    self.handle_conversation_turn(intruder_reply=None)
+                    # FACE RECOGNITION (always check, even during conversation) - shared worker, batched across cameras
+                    self.scheduler.set_alert(room.name, room.siren_active or room.in_conversation)
+                    self.recognizer.set_alert(room.name, room.siren_active or room.in_conversation)
+                    if current_time - room.last_check_time >= self.scheduler.interval(room.name, current_time):
+                        room.last_check_time = current_time
+                        if (motion is None or motion.moving or room.results
+                                or current_time - room.last_full_check >= MOTION_RECHECK_INTERVAL):
+                            # Motion regions only when looking for newcomers - faces already in view need the whole frame
+                            rois = motion.rois if motion is not None and motion.moving and not room.results else None
+                            # The worker keeps its frame for seconds - copy it out of the ring
+                            self.recognition_worker.submit(frame.copy(), room.frame_seq, room.name, rois)
+                            self.scheduler.submitted(room.name)
+                            if rois is None:
+                                room.last_full_check = current_time
                         else:
-                            consecutive_unknown = 0
+                            # Still, empty scene: skip detection; it still counts toward "room clear"
+                            room.motion_skips += 1
+                            if room.siren_active:
+                                self._count_room_clear(room, current_time)
                     
-                    last_check_time = current_time
-                
-                # CONVERSATION HANDLING
-                if in_conversation and waiting_for_response:
-                    if not self.speaking and not self.listening and not self.conversation_queue.empty():
-                        intruder_reply = self.conversation_queue.get()
-                        
-                        if intruder_reply:
-                            print(f"✅ Intruder: '{intruder_reply}'")
-                            self.handle_conversation_turn(intruder_reply=intruder_reply)
-                        else:
-                            print("⚠️ No valid response - escalating")
-                            self.agent.escalate()
-                            
-                            if self.agent.escalation_level >= MAX_ESCALATION_LEVEL:
-                                print("\n🚨 MAXIMUM ESCALATION!\n")
-                                print("🚨 ACTIVATING CONTINUOUS SIREN!\n")
-                                self.speak_async("FINAL WARNING! AUTHORITIES NOTIFIED! ALARM ACTIVATED!")
-                                time.sleep(2)
-                                
-                                self.siren.start()
-                                siren_active = True
-                                
-                                # Send alerts
-                                if self.alert_system:
-                                    alert_image_path = None
-                                    alert_intruder_id = None
-                                    
-                                    if intruder_encoding is not None and not intruder_added:
-                                        new_intruder_id = self.recognizer.add_intruder(frame, intruder_encoding)
-                                        
-                                        if new_intruder_id:
-                                            intruder_added = True
-                                            alert_intruder_id = new_intruder_id
-                                            
-                                            for filename in os.listdir(INTRUDER_DB_DIR):
-                                                if new_intruder_id in filename and filename.endswith('.jpg'):
-                                                    alert_image_path = os.path.join(INTRUDER_DB_DIR, filename)
-                                                    break
-                                    
-                                    elif current_intruder_id:
-                                        alert_intruder_id = current_intruder_id
-                                        
-                                        for filename in os.listdir(INTRUDER_DB_DIR):
-                                            if current_intruder_id in filename and filename.endswith('.jpg'):
-                                                alert_image_path = os.path.join(INTRUDER_DB_DIR, filename)
-                                                break
-                                    
-                                    if alert_intruder_id and alert_image_path:
-                                        print("\n📨 Sending maximum escalation alert...")
-                                        print(f"   Intruder: {alert_intruder_id}")
-                                        print(f"   Image: {alert_image_path}")
-                                        
-                                        alert_thread = threading.Thread(
-                                            target=self.alert_system.send_all_alerts,
-                                            args=(alert_intruder_id, alert_image_path, self.agent.escalation_level),
-                                            daemon=True
-                                        )
-                                        alert_thread.start()
-                                        alerted_intruders.add(alert_intruder_id)
-                                    else:
-                                        print("⚠️ Unable to send alert - no intruder image found")
-                                
-                                waiting_for_response = False
-                            else:
-                                time.sleep(0.5)
-                                self.handle_conversation_turn(intruder_reply=None)
-                
-                # DISPLAY
-                display_frame = frame.copy()
-                
-                if 'results' in locals() and results:
-                    display_frame = self.recognizer.draw_results(display_frame, results)
-                
-                status = "MONITORING"
-                if siren_active:
-                    status = "🚨 SIREN ACTIVE 🚨"
-                elif in_conversation:
-                    status = f"ALERT-L{self.agent.escalation_level}"
-                if self.speaking:
-                    status += " | SPEAKING"
-                if self.listening:
-                    status += " | LISTENING"
+                    packet = self.recognition_worker.latest(room.name)
+                    if packet is not None and packet.seq > room.last_result_seq:
+                        room.last_result_seq = packet.seq
+                        room.results = packet.results
+                        room.recognized_frame = packet.frame
+                        self.scheduler.observe(room.name, packet.results, packet.compute, current_time)
+                        with self.stages.stage("decide"):
+                            self._process_recognition(room, current_time)
+                    
+                    with self.stages.stage("display"):
+                        self._show(room, display_frame)
                 
-                cv2.putText(display_frame, status, (10, 30),
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
+                if not got_frame:
+                    waiting = [room for room in self.rooms if not room.camera.finished]
+                    if not waiting:
+                        print("\n📼 All recordings played\n")
+                        break
+                    # Sleep until a camera delivers instead of polling (a finished replay would return at once)
+                    waiting[0].camera.wait_for_frame(waiting[0].camera_seq, timeout=0.1)
                 
-                cv2.imshow('AI Room Guard', display_frame)
+                # CONVERSATION HANDLING (one conversation at a time - shared speaker/mic)
+                if self.conversation_room is not None:
+                    self._handle_conversation(self.conversation_room)
                 
-                key = cv2.waitKey(30) & 0xFF
-                if key == ord('q'):
+                # Every pass, frame or not - a stalled camera must not block quit/deactivate
+                command = self._next_command()
+                if command == "quit":
                     print("\n🛑 QUIT\n")
-                    if siren_active:
-                        self.siren.stop()
                     break
-                elif key == ord('d'):
+                elif command == "deactivate":
                     print("\n🛑 DEACTIVATE\n")
-                    if siren_active:
-                        self.siren.stop()
                     break
+                elif command in PERFORMANCE_PRESETS:
+                    self.set_preset(command)
         
         except Exception as e:
             print(f"❌ Error: {e}")
@@ -439,10 +332,309 @@ class AIRoomGuard:
             traceback.print_exc()
         
         finally:
-            if siren_active:
+            if self.siren.is_playing():
                 self.siren.stop()
-            self.camera.stop()
-            cv2.destroyAllWindows()
+            self.recognition_worker.stop()
+            for room in self.rooms:
+                room.camera.stop()
+                if room.evidence is not None:
+                    room.evidence.flush(wait=True)
+            if self.preview is not None:
+                self.preview.stop()
+            if not HEADLESS:
+                cv2.destroyAllWindows()
+    
+    def _next_command(self):
+        """Next control command: a key in the OpenCV window, else one from HTTP/signals (or None)"""
+        if not HEADLESS:
+            key = cv2.waitKey(1) & 0xFF
+            if key == ord('q'):
+                return "quit"
+            elif key == ord('d'):
+                return "deactivate"
+            elif key in (ord('1'), ord('2'), ord('3')):
+                return ("eco", "balanced", "accurate")[key - ord('1')]
+        if self.commands.empty():
+            return None
+        return self.commands.get_nowait()
+    
+    def _install_signal_handlers(self):
+        """SIGTERM quits cleanly, SIGUSR1 deactivates (POSIX) - for service managers and headless hosts"""
+        if threading.current_thread() is not threading.main_thread():
+            return
+        signal.signal(signal.SIGTERM, lambda signum, frame: self.commands.put("quit"))
+        if hasattr(signal, "SIGUSR1"):
+            signal.signal(signal.SIGUSR1, lambda signum, frame: self.commands.put("deactivate"))
+    
+    def status(self):
+        """Guard status for the preview server's /status"""
+        rooms = []
+        for room in self.rooms:
+            latency = self.recognition_worker.last_latency(room.name)
+            rooms.append({
+                "name": room.name,
+                "fps": round(room.fps, 1),
+                "recognition_mode": self.scheduler.mode(room.name)[0],
+                "recognition_latency_ms": round(latency * 1000) if latency is not None else None,
+                "faces": [r.name for r in room.results],
+                "unknown_count": room.unknown_count,
+                "in_conversation": room.in_conversation,
+                "siren_active": room.siren_active,
+            })
+        return {
+            "guard_active": self.state.guard_active,
+            "preset": self.preset or "custom",
+            "uptime_s": round(time.time() - self.start_time),
+            "speaking": self.speaking,
+            "listening": self.listening,
+            "rooms": rooms,
+        }
+    
+    def _send_alert_async(self, send, intruder_id, *args):
+        """Send an alert on a background thread once the intruder photo is on disk"""
+        def _send():
+            image_path = self.recognizer.intruder_image_path(intruder_id, timeout=10.0)
+            if not image_path:
+                print(f"⚠️ Unable to send alert - no intruder image found ({intruder_id})")
+                return
+            print(f"   Image: {image_path}")
+            send(intruder_id, image_path, *args)
+        
+        threading.Thread(target=_send, daemon=True).start()
+    
+    def set_preset(self, name):
+        """Switch performance preset at runtime (detector, encoder, recognition rate)"""
+        if name == self.preset:
+            return
+        try:
+            apply_preset(name, self.recognizer.engine, self.scheduler)
+        except Exception as e:  # Model load errors (cv2.error, RuntimeError) too - the old preset stays active
+            print(f"⚠️ Preset not applied: {e}")
+            return
+        self.preset = name
+        self.logger.log_metrics("preset", {"preset": name})
+    
+    def _reset_room(self, room, current_time):
+        """Clear a room's intruder state (and the conversation if it owned it)"""
+        room.reset()
+        room.last_check_time = current_time
+        if self.conversation_room is room:
+            self.conversation_room = None
+            self.agent.reset()
+            self.state.end_conversation()
+    
+    def _stop_siren(self, room):
+        """Siren is shared - it stops once no room still needs it"""
+        room.siren_active = False
+        if not any(r.siren_active for r in self.rooms):
+            self.siren.stop()
+    
+    def _count_room_clear(self, room, current_time):
+        """One more empty check; stops the siren once empty for ROOM_CLEAR_SECONDS → True if the room was reset"""
+        if room.empty_since is None:
+            room.empty_since = current_time
+        if current_time - room.empty_since >= ROOM_CLEAR_SECONDS:
+            print(f"\n✅ ROOM CLEAR ({room.name}) - STOPPING SIREN\n")
+            self._stop_siren(room)
+            self.speak_async("Intruder has left. Alarm Deactivated")
+            
+            # Reset all state
+            self._reset_room(room, current_time)
+            return True
+        return False
+    
+    def _process_recognition(self, room, current_time):
+        """Run one room's state machine on fresh recognition results"""
+        results = room.results
+        for result in results:
+            if result.name not in ("Unknown", "Unassessable"):
+                self.logger.log_recognition(result, correct=True)
+        
+        has_unknown = any(r.is_unknown for r in results)
+        has_known = any(r.is_trusted for r in results)
+        # Only a face encoded on this tick may silence the siren - never a label carried by a track
+        verified_known = any(r.is_trusted and not r.reused for r in results)
+        
+        # PRIORITY 1: Stop siren if trusted person detected
+        if room.siren_active and verified_known:
+            print(f"\n✅ TRUSTED PERSON DETECTED ({room.name}) - STOPPING SIREN\n")
+            self._stop_siren(room)
+            
+            for result in results:
+                if result.is_trusted and not result.reused:
+                    self.speak_async(f"Welcome {result.name}! Alarm deactivated.")
+            
+            # Reset all state
+            self._reset_room(room, current_time)
+            return
+        
+        # PRIORITY 2: Stop siren if room clear (no faces at all, assessable or not)
+        if room.siren_active and not results:
+            if self._count_room_clear(room, current_time):
+                return
+        else:
+            room.empty_since = None
+        
+        # NEW DETECTIONS (only if not in conversation)
+        if not room.in_conversation and not self.speaking and not self.listening:
+            
+            # Greet known people
+            if has_known and not room.siren_active:
+                for result in results:
+                    if result.is_trusted:
+                        self.greet_known_person(result.name)
+                
+                if room.unknown_count > 0:
+                    print(f"✅ Trusted person ({room.name}). Resetting.")
+                    room.unknown_count = 0
+                    room.consecutive_unknown = 0
+                    room.intruder_encoding = None
+                    room.intruder_frame = None
+            
+            # Handle unknowns
+            if has_unknown and not has_known and not room.siren_active:
+                room.consecutive_unknown += 1
+                
+                if room.consecutive_unknown >= 2:
+                    room.unknown_count += 1
+                    room.consecutive_unknown = 0
+                    print(f"⚠️ Unknown person in {room.name}! ({room.unknown_count}/{UNKNOWN_THRESHOLD})")
+                    
+                    os.makedirs(CAPTURES_DIR, exist_ok=True)
+                    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+                    
+                    room.current_intruder_id = None
+                    is_repeat_intruder = False
+                    
+                    for result in results:
+                        name, intruder_id = result.name, result.intruder_id
+                        if name == "REPEAT_INTRUDER":
+                            print(f"🚨 KNOWN INTRUDER: {intruder_id}")
+                            room.current_intruder_id = intruder_id
+                            is_repeat_intruder = True
+                            self.recognizer.record_intruder_sighting(intruder_id)
+                            
+                            if self.alert_system and intruder_id not in self.alerted_intruders:
+                                print(f"\n🚨 REPEAT INTRUDER ALERT: {intruder_id}")
+                                print("📨 Sending immediate alert...")
+                                self._send_alert_async(self.alert_system.send_repeat_intruder_alert, intruder_id)
+                                self.alerted_intruders.add(intruder_id)
+                            
+                            self.speak_async(f"Alert! Known intruder {intruder_id} detected!")
+                            if self.conversation_room is None:
+                                self.agent.escalation_level = 2
+                        
+                        elif name == "Unknown":
+                            room.intruder_encoding = result.encoding
+                            room.intruder_frame = room.recognized_frame  # The moment this encoding shows
+                    
+                    prefix = "intruder" if len(self.rooms) == 1 else f"intruder_{room.name}"
+                    filepath = os.path.join(CAPTURES_DIR, f"{prefix}_{timestamp}.jpg")
+                    room.camera.save_frame(room.recognized_frame, filepath)
+                    if room.evidence is not None:
+                        # Moment of entry: pre-roll + the next seconds as a clip
+                        room.evidence.trigger(os.path.join(CAPTURES_DIR, f"{prefix}_{timestamp}.mp4"), current_time)
+                    
+                    if room.unknown_count >= UNKNOWN_THRESHOLD and self.conversation_room is None:
+                        self.state.detect_intruder()
+                        self.state.start_conversation()
+                        room.in_conversation = True
+                        room.waiting_for_response = True
+                        self.conversation_room = room
+                        
+                        print(f"\n💬 STARTING CONVERSATION ({room.name})\n")
+                        if is_repeat_intruder:
+                            print(f"⚠️ Starting at Level {self.agent.escalation_level}")
+                        
+                        time.sleep(0.5)
+                        self.handle_conversation_turn(intruder_reply=None)
+            else:
+                room.consecutive_unknown = 0
+    
+    def _handle_conversation(self, room):
+        """Advance the conversation owned by a room"""
+        if not (room.in_conversation and room.waiting_for_response):
+            return
+        if self.speaking or self.listening or self.conversation_queue.empty():
+            return
+        
+        intruder_reply = self.conversation_queue.get()
+        
+        if intruder_reply:
+            print(f"✅ Intruder: '{intruder_reply}'")
+            self.handle_conversation_turn(intruder_reply=intruder_reply)
+            return
+        
+        print("⚠️ No valid response - escalating")
+        self.agent.escalate()
+        
+        if self.agent.escalation_level < MAX_ESCALATION_LEVEL:
+            time.sleep(0.5)
+            self.handle_conversation_turn(intruder_reply=None)
+            return
+        
+        print("\n🚨 MAXIMUM ESCALATION!\n")
+        print(f"🚨 ACTIVATING CONTINUOUS SIREN! ({room.name})\n")
+        self.speak_async("FINAL WARNING! AUTHORITIES NOTIFIED! ALARM ACTIVATED!")
+        time.sleep(2)
+        
+        self.siren.start()
+        room.siren_active = True
+        
+        # Send alerts
+        if self.alert_system:
+            alert_intruder_id = None
+            
+            if room.intruder_encoding is not None and not room.intruder_added:
+                new_intruder_id = self.recognizer.add_intruder(room.intruder_frame, room.intruder_encoding)
+                
+                if new_intruder_id:
+                    room.intruder_added = True
+                    alert_intruder_id = new_intruder_id
+            
+            elif room.current_intruder_id:
+                alert_intruder_id = room.current_intruder_id
+            
+            if alert_intruder_id:
+                print("\n📨 Sending maximum escalation alert...")
+                print(f"   Intruder: {alert_intruder_id}")
+                self._send_alert_async(self.alert_system.send_all_alerts, alert_intruder_id,
+                                       self.agent.escalation_level)
+                self.alerted_intruders.add(alert_intruder_id)
+            else:
+                print("⚠️ Unable to send alert - no intruder image found")
+        
+        room.waiting_for_response = False
+    
+    def _show(self, room, display_frame):
+        """Draw overlay + status for one camera (on display_frame - pass a copy)"""
+        if room.roi_mask is not None:
+            room.roi_mask.draw(display_frame)
+        if room.results:
+            display_frame = self.recognizer.draw_results(display_frame, room.results)
+        
+        status = "MONITORING"
+        if room.siren_active:
+            status = "🚨 SIREN ACTIVE 🚨"
+        elif room.in_conversation:
+            status = f"ALERT-L{self.agent.escalation_level}"
+        if self.conversation_room is room:
+            if self.speaking:
+                status += " | SPEAKING"
+            if self.listening:
+                status += " | LISTENING"
+        status += f" | {room.fps:.0f} FPS"
+        latency = self.recognition_worker.last_latency(room.name)
+        if latency is not None:
+            status += f" | REC {latency * 1000:.0f}ms"
+        
+        cv2.putText(display_frame, status, (10, 30),
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
+        
+        if self.preview is not None:
+            self.preview.publish(room.name, display_frame)  # Fresh copy - the server may hold on to it
+        if not HEADLESS:
+            cv2.imshow(room.window_name, display_frame)
     
     def deactivate(self):
         """Deactivate system"""
@@ -451,6 +643,18 @@ class AIRoomGuard:
             print("\n" + "="*60)
             print(f"📊 Session Duration: {session_duration:.1f} minutes")
             
+            for room in self.rooms:
+                metrics = self.recognition_worker.metrics(room.name)
+                metrics["display_fps"] = room.fps
+                metrics.update(self.scheduler.metrics(room.name))
+                metrics["motion_skips"] = room.motion_skips
+                metrics.update(self.recognizer.tracking_metrics().get(room.name, {}))
+                self.logger.log_metrics(f"recognition[{room.name}]", metrics)
+            if self.recognizer.quality_rejections:
+                self.logger.log_metrics("unassessable_faces", dict(self.recognizer.quality_rejections))
+            self.logger.log_metrics("evidence_writer", self.writer.metrics())
+            for stage, timing in self.stages.summary().items():
+                self.logger.log_metrics(f"stage[{stage}]", timing)
             self.logger.print_stats()
             self.logger.save()
             
@@ -473,6 +677,8 @@ class AIRoomGuard:
             print("\n\n⚠️ INTERRUPTED\n")
         finally:
             self.deactivate()
+            self.recognizer.close()
+            self.writer.close()
             print("\n✅ SYSTEM SHUTDOWN COMPLETE\n")
 
 
@@ -0,0 +1,128 @@
+"""
+Cheap motion detection - decides whether a frame is worth running face detection on
+"""
+import time
+import cv2
+import numpy as np
+
+
+class MotionResult:
+    """Motion found in one frame; rois are full-resolution (top, right, bottom, left) boxes"""
+    __slots__ = ('moving', 'rois', 'changed_fraction')
+
+    def __init__(self, moving, rois, changed_fraction):
+        self.moving = moving
+        self.rois = rois  # None = whole frame
+        self.changed_fraction = changed_fraction
+
+
+class MotionDetector:
+    """
+    Frame differencing against a running-average background on a small
+    blurred grayscale copy of the frame. Changed regions are padded (a
+    moving hand or shoulder should bring the whole face into the ROI)
+    and merged; if they cover most of the frame the whole frame is used.
+    """
+
+    def __init__(self, width=160, threshold=25, alpha=0.05, min_area=0.002,
+                 roi_padding=0.5, full_frame_fraction=0.5, warmup_frames=10):
+        self.width = width  # Detection runs on a frame this wide
+        self.threshold = threshold  # Grey-level change counted as motion
+        self.alpha = alpha  # Background learning rate
+        self.min_area = min_area  # Fraction of the frame that must change
+        self.roi_padding = roi_padding  # Grow each ROI by this fraction of its size on every side
+        self.full_frame_fraction = full_frame_fraction
+        self.warmup_frames = warmup_frames
+        self.reset()
+
+    def reset(self):
+        self._background = None
+        self._frames = 0
+        self.last_motion_time = 0.0
+
+    def detect(self, bgr_frame, roi_mask=None):
+        """MotionResult for one frame; changes outside roi_mask (TVs, windows) are ignored"""
+        height, width = bgr_frame.shape[:2]
+        scale = min(1.0, self.width / float(width))
+        small = cv2.resize(bgr_frame, (max(1, int(width * scale)), max(1, int(height * scale))),
+                           interpolation=cv2.INTER_AREA)
+        gray = cv2.GaussianBlur(cv2.cvtColor(small, cv2.COLOR_BGR2GRAY), (5, 5), 0).astype(np.float32)
+
+        self._frames += 1
+        if self._background is None or self._background.shape != gray.shape:
+            self._background = gray
+            self.last_motion_time = time.time()
+            return MotionResult(True, None, 1.0)
+
+        mask = cv2.absdiff(gray, self._background) > self.threshold
+        if roi_mask is not None:
+            mask &= roi_mask.mask(gray.shape).astype(bool)
+        cv2.accumulateWeighted(gray, self._background, self.alpha)
+
+        changed = float(mask.mean())
+        if self._frames <= self.warmup_frames:
+            # Background still settling (camera auto-exposure) - treat as motion, whole frame
+            self.last_motion_time = time.time()
+            return MotionResult(True, None, changed)
+        if changed < self.min_area:
+            return MotionResult(False, [], changed)
+
+        self.last_motion_time = time.time()
+        if changed >= self.full_frame_fraction:
+            return MotionResult(True, None, changed)
+        return MotionResult(True, self._regions(mask.astype(np.uint8), 1.0 / scale, width, height), changed)
+
+    def _regions(self, mask, inv_scale, width, height):
+        """Padded, merged bounding boxes of the changed blobs, in full-resolution coordinates"""
+        mask = cv2.dilate(mask, np.ones((3, 3), np.uint8), iterations=2)
+        n, _, stats, _ = cv2.connectedComponentsWithStats(mask)
+        min_pixels = self.min_area * mask.size / 4
+        boxes = []
+        for x, y, w, h, area in stats[1:n]:
+            if area < min_pixels:
+                continue
+            pad_x, pad_y = w * self.roi_padding, h * self.roi_padding
+            boxes.append([max(0, int((y - pad_y) * inv_scale)), min(width, int((x + w + pad_x) * inv_scale)),
+                          min(height, int((y + h + pad_y) * inv_scale)), max(0, int((x - pad_x) * inv_scale))])
+        boxes = merge_boxes(boxes)
+
+        area = sum((b[2] - b[0]) * (b[1] - b[3]) for b in boxes)
+        if not boxes or area >= self.full_frame_fraction * width * height:
+            return None
+        return [tuple(b) for b in boxes]
+
+
+def merge_boxes(boxes):
+    """Merge overlapping (top, right, bottom, left) boxes until none overlap"""
+    merged = True
+    while merged:
+        merged = False
+        for i in range(len(boxes)):
+            for j in range(i + 1, len(boxes)):
+                a, b = boxes[i], boxes[j]
+                if a[0] < b[2] and b[0] < a[2] and a[3] < b[1] and b[3] < a[1]:
+                    boxes[i] = [min(a[0], b[0]), max(a[1], b[1]), max(a[2], b[2]), min(a[3], b[3])]
+                    del boxes[j]
+                    merged = True
+                    break
+            if merged:
+                break
+    return boxes
+
+
+if __name__ == "__main__":
+    # Quick self-test: static scene → no motion, moving square → one ROI around it
+    detector = MotionDetector(warmup_frames=0)
+    frame = np.full((480, 640, 3), 80, np.uint8)
+    detector.detect(frame)
+    print("Static:", detector.detect(frame).moving)
+
+    moved = frame.copy()
+    moved[200:260, 300:360] = 255
+    result = detector.detect(moved)
+    print(f"Moving square: moving={result.moving} rois={result.rois} changed={result.changed_fraction:.3f}")
+
+    start = time.perf_counter()
+    for _ in range(200):
+        detector.detect(frame)
+    print(f"⏱️ {(time.perf_counter() - start) / 200 * 1000:.2f} ms per frame")
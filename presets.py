@@ -0,0 +1,100 @@
+"""
+Performance presets (eco / balanced / accurate) - detector, encoder and recognition rate in one switch
+"""
+import sys
+import time
+
+from config import (PERFORMANCE_PRESETS, FACE_DETECTOR, DETECTION_UPSAMPLE, DETECTION_SCALE, LANDMARK_MODEL,
+                    NUM_JITTERS, RECOGNITION_INTERVALS, DNN_FACE_MODEL, DNN_CONFIDENCE, ENCODING_BATCH_SIZE)
+from face_detectors import make_detector
+
+
+def preset_settings(name=None):
+    """Settings of a named preset; None → the individual values in config.py"""
+    custom = {
+        "detector": FACE_DETECTOR, "upsample": DETECTION_UPSAMPLE, "scale": DETECTION_SCALE,
+        "landmark_model": LANDMARK_MODEL, "num_jitters": NUM_JITTERS, "intervals": RECOGNITION_INTERVALS,
+    }
+    if name is None:
+        return custom
+    if name not in PERFORMANCE_PRESETS:
+        raise ValueError(f"Unknown performance preset: {name} (choose from {', '.join(PERFORMANCE_PRESETS)})")
+    return {**custom, **PERFORMANCE_PRESETS[name]}
+
+
+def build_detector(settings):
+    return make_detector(settings["detector"], settings["scale"], settings["upsample"],
+                         DNN_FACE_MODEL, DNN_CONFIDENCE)
+
+
+def apply_preset(name, engine, scheduler=None):
+    """
+    Reconfigure a running engine (and the scheduler's intervals) → applied settings.
+    The preset's models are loaded and tried first; if that fails nothing is
+    switched and the error propagates.
+    """
+    from recognition_engine import check_models
+
+    settings = preset_settings(name)
+    detector = build_detector(settings)
+    check_models(detector, settings["landmark_model"], settings["num_jitters"])
+    engine.configure(detector, settings["landmark_model"], settings["num_jitters"])
+    if scheduler is not None:
+        scheduler.intervals = dict(settings["intervals"])
+    print(f"⚙️ Performance preset: {name or 'custom'} ({settings['detector']} x{settings['scale']:g}, "
+          f"upsample {settings['upsample']}, {settings['landmark_model']} landmarks, "
+          f"{settings['num_jitters']} jitter(s))")
+    return settings
+
+
+def benchmark_presets(frames, names=None):
+    """
+    Pipeline FPS and CPU use of each preset on this host.
+    cpu_% is process CPU time per wall second while recognizing back to back;
+    duty_% is the share of one core the preset needs at its 'active' interval.
+    """
+    from recognition_engine import LocalEngine
+
+    results = {}
+    for name in names or PERFORMANCE_PRESETS:
+        settings = preset_settings(name)
+        engine = LocalEngine(batch_size=ENCODING_BATCH_SIZE)
+        try:
+            engine.configure(build_detector(settings), settings["landmark_model"], settings["num_jitters"])
+            engine.detect_and_encode(frames[0])  # Warm-up (lazy model loads)
+
+            wall_start, cpu_start = time.perf_counter(), time.process_time()
+            faces = sum(len(engine.detect_and_encode(frame)[0]) for frame in frames)
+            wall = time.perf_counter() - wall_start
+            cpu = time.process_time() - cpu_start
+        except (FileNotFoundError, ValueError) as e:
+            print(f"{name:>10}: skipped ({e})")
+            continue
+
+        per_frame = wall / len(frames)
+        results[name] = {
+            "fps": len(frames) / wall,
+            "ms_per_frame": per_frame * 1000,
+            "cpu_percent": cpu / wall * 100,
+            "duty_percent": min(1.0, per_frame / settings["intervals"]["active"]) * 100,
+            "faces": faces,
+        }
+        r = results[name]
+        print(f"{name:>10}: {r['fps']:6.1f} FPS  {r['ms_per_frame']:7.1f} ms/frame  "
+              f"CPU {r['cpu_percent']:5.0f}%  duty {r['duty_percent']:5.1f}%  {faces} faces")
+    return results
+
+
+if __name__ == "__main__":
+    # python presets.py <video file | directory of frames> [max frames]
+    if len(sys.argv) < 2:
+        print("Usage: python presets.py <video|frames_dir> [max_frames]")
+        sys.exit(1)
+
+    from face_detectors import load_frames
+    frames = load_frames(sys.argv[1], int(sys.argv[2]) if len(sys.argv) > 2 else 50)
+    if not frames:
+        print(f"❌ No frames in {sys.argv[1]}")
+        sys.exit(1)
+    print(f"Benchmarking {len(PERFORMANCE_PRESETS)} presets on {len(frames)} frames")
+    benchmark_presets(frames)
@@ -0,0 +1,204 @@
+"""
+Local HTTP preview - MJPEG streams, status JSON and controls (for headless mode)
+"""
+import hmac
+import html
+import json
+import secrets
+import threading
+from urllib.parse import urlsplit, parse_qs, quote, unquote
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import cv2
+
+COMMANDS = ("quit", "deactivate", "eco", "balanced", "accurate")
+
+
+class _Stream:
+    """Latest annotated frame of one camera + its JPEG, encoded at most once per frame"""
+
+    def __init__(self):
+        self.seq = 0
+        self.frame = None
+        self.jpeg = None
+        self.jpeg_seq = 0
+        self.encode_lock = threading.Lock()
+
+
+class PreviewServer:
+    """
+    GET  /                  - page with every camera
+    GET  /stream/<camera>   - MJPEG stream
+    GET  /snapshot/<camera> - latest JPEG
+    GET  /status            - guard status JSON
+    POST /control/<command> - quit, deactivate or a performance preset
+    publish() only stores a reference; frames are JPEG-encoded on demand,
+    once, and the same bytes are sent to every viewer.
+    Controls need the token (X-Guard-Token header or ?token=) and are refused
+    for cross-site requests; every request must name this server in Host
+    (DNS rebinding). Without a configured token a random one is made per run.
+    """
+
+    def __init__(self, host="127.0.0.1", port=8080, jpeg_quality=80, status=None, on_command=None, token=None):
+        self.host = host
+        self.port = port
+        self.token = token or secrets.token_urlsafe(16)
+        self.allowed_hosts = {f"{name}:{port}" for name in (host, "127.0.0.1", "localhost")}
+        self.encode_params = [cv2.IMWRITE_JPEG_QUALITY, jpeg_quality]
+        self.status = status or (lambda: {})
+        self.on_command = on_command or (lambda command: None)
+        self._streams = {}
+        self._cond = threading.Condition()
+        self.running = False
+        self.encoded_frames = 0
+        self.viewers = 0
+        self._httpd = None
+        self._thread = None
+
+    def start(self):
+        self._httpd = ThreadingHTTPServer((self.host, self.port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self.running = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        print(f"🌐 Preview server: http://{self.host}:{self.port}/")
+        print(f"🔑 Control token: {self.token} (POST /control/<command> with header X-Guard-Token)")
+
+    def stop(self):
+        with self._cond:
+            self.running = False
+            self._cond.notify_all()
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+    def publish(self, name, frame):
+        """Hand over the latest annotated frame of a camera (the caller must not modify it afterwards)"""
+        with self._cond:
+            stream = self._streams.get(name)
+            if stream is None:
+                stream = self._streams[name] = _Stream()
+            stream.frame = frame
+            stream.seq += 1
+            self._cond.notify_all()
+
+    def cameras(self):
+        with self._cond:
+            return list(self._streams)
+
+    def next_jpeg(self, name, after_seq=0, timeout=1.0):
+        """(seq, jpeg bytes) of the first frame newer than after_seq, or None on timeout/unknown camera"""
+        with self._cond:
+            if not self._cond.wait_for(lambda: not self.running or
+                                       (name in self._streams and self._streams[name].seq > after_seq), timeout):
+                return None
+            if not self.running:
+                return None
+            stream = self._streams[name]
+
+        with stream.encode_lock:
+            with self._cond:
+                seq, frame = stream.seq, stream.frame
+            if stream.jpeg_seq != seq:
+                ok, jpeg = cv2.imencode('.jpg', frame, self.encode_params)
+                if not ok:
+                    return None
+                stream.jpeg, stream.jpeg_seq = jpeg.tobytes(), seq
+                self.encoded_frames += 1
+            return stream.jpeg_seq, stream.jpeg
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass  # Keep the console for guard messages
+
+            def _send(self, code, body, content_type="application/json"):
+                self.send_response(code)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("Cache-Control", "no-store")
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _json(self, code, data):
+                self._send(code, json.dumps(data, default=str).encode("utf-8"))
+
+            def _host_ok(self):
+                """Host must name this server (a rebound DNS name must not reach the cameras)"""
+                if server.host in ("0.0.0.0", "::", ""):
+                    return True
+                return self.headers.get("Host", "") in server.allowed_hosts
+
+            def _control_ok(self, query):
+                origin = self.headers.get("Origin")
+                if origin and urlsplit(origin).netloc != self.headers.get("Host", ""):
+                    return False  # Cross-site form / fetch from a page the operator has open
+                token = self.headers.get("X-Guard-Token") or query.get("token", [""])[0]
+                return hmac.compare_digest(token.encode("utf-8"), server.token.encode("utf-8"))
+
+            def do_GET(self):
+                if not self._host_ok():
+                    self._json(403, {"error": "forbidden host"})
+                    return
+                self.path = urlsplit(self.path).path
+                parts = [unquote(part) for part in self.path.strip("/").split("/")]
+                if self.path in ("/", "/index.html"):
+                    images = "".join(f'<h3>{html.escape(name)}</h3><img src="/stream/{quote(name, safe="")}">'
+                                     for name in server.cameras())
+                    page = (f"<html><head><title>AI Room Guard</title></head><body>"
+                            f"<h2>AI Room Guard</h2>{images}<p><a href=\"/status\">status</a></p></body></html>")
+                    self._send(200, page.encode("utf-8"), "text/html")
+                elif parts[0] == "status":
+                    self._json(200, server.status())
+                elif parts[0] == "snapshot" and len(parts) == 2:
+                    latest = server.next_jpeg(parts[1], 0, timeout=2.0)
+                    if latest is None:
+                        self._json(404, {"error": f"no frames from {parts[1]}"})
+                    else:
+                        self._send(200, latest[1], "image/jpeg")
+                elif parts[0] == "stream" and len(parts) == 2:
+                    self._stream(parts[1])
+                else:
+                    self._json(404, {"error": "not found"})
+
+            def do_POST(self):
+                url = urlsplit(self.path)
+                if not self._host_ok() or not self._control_ok(parse_qs(url.query)):
+                    self._json(403, {"error": "control token required"})
+                    return
+                parts = url.path.strip("/").split("/")
+                if len(parts) == 2 and parts[0] == "control" and parts[1] in COMMANDS:
+                    server.on_command(parts[1])
+                    self._json(200, {"ok": True, "command": parts[1]})
+                else:
+                    self._json(404, {"error": f"commands: {', '.join(COMMANDS)}"})
+
+            def _stream(self, name):
+                if name not in server.cameras():
+                    self._json(404, {"error": f"no frames from {name}"})  # Don't hold a thread for it
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "multipart/x-mixed-replace; boundary=frame")
+                self.send_header("Cache-Control", "no-store")
+                self.end_headers()
+                with server._cond:
+                    server.viewers += 1
+                seq = 0
+                try:
+                    while server.running:
+                        latest = server.next_jpeg(name, seq, timeout=1.0)
+                        if latest is None:
+                            continue
+                        seq, jpeg = latest
+                        self.wfile.write(b"--frame\r\nContent-Type: image/jpeg\r\n"
+                                         + f"Content-Length: {len(jpeg)}\r\n\r\n".encode("ascii")
+                                         + jpeg + b"\r\n")
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # Viewer closed the page
+                finally:
+                    with server._cond:
+                        server.viewers -= 1
+
+        return Handler
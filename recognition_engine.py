@@ -0,0 +1,412 @@
+"""
+Recognition engines - where face detection + encoding run
+"""
+import os
+import sys
+import time
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait
+from multiprocessing import shared_memory
+import numpy as np
+import dlib
+import face_recognition
+from face_recognition import api as fr_api
+from face_tracker import match_boxes
+
+CHIP_SIZE = 150  # Input size of dlib's ResNet encoder
+CHIP_PADDING = 0.25  # Same alignment as face_recognition.face_encodings
+LANDMARK_MODELS = ("small", "large")
+
+
+def encode_chips(chips, batch_size=32, num_jitters=1):
+    """128-D descriptors for aligned face chips, computed batch_size chips per network call"""
+    encodings = []
+    for start in range(0, len(chips), batch_size):
+        batch = chips[start:start + batch_size]
+        descriptors = fr_api.face_encoder.compute_face_descriptor(batch, num_jitters)
+        encodings.extend(np.array(d, dtype=np.float64) for d in descriptors)
+    return encodings
+
+
+def check_models(detector=None, landmark_model="small", num_jitters=1):
+    """
+    Load a detector + encoder configuration now - one detection and one
+    encoding on a blank frame - so a missing model file or a bad setting
+    raises here instead of on every recognition tick.
+    """
+    if landmark_model not in LANDMARK_MODELS:
+        raise ValueError(f"Unknown landmark model: {landmark_model} (choose from {', '.join(LANDMARK_MODELS)})")
+    if num_jitters < 1:
+        raise ValueError(f"num_jitters must be at least 1, got {num_jitters}")
+    frame = np.zeros((CHIP_SIZE, CHIP_SIZE, 3), dtype=np.uint8)
+    if detector is not None:
+        detector.detect(frame)
+    box = (CHIP_SIZE // 5, CHIP_SIZE * 4 // 5, CHIP_SIZE * 4 // 5, CHIP_SIZE // 5)
+    landmarks = dlib.full_object_detections(fr_api._raw_face_landmarks(frame, [box], model=landmark_model))
+    encode_chips(dlib.get_face_chips(frame, landmarks, size=CHIP_SIZE, padding=CHIP_PADDING), 1, num_jitters)
+
+
+def detect_in_rois(detect, rgb_frame, rois=None, roi_mask=None):
+    """
+    Run a detector on each region of interest only; boxes come back in frame
+    coordinates. With a camera RoiMask, regions are clipped to it, pixels
+    outside its polygons are blacked out and faces centred outside are dropped.
+    """
+    if rois is None and roi_mask is None:
+        return detect(rgb_frame)
+    if roi_mask is not None:
+        regions = roi_mask.regions(rgb_frame.shape, rois)
+        crop = lambda region: roi_mask.crop(rgb_frame, region)
+    else:
+        regions = rois
+        crop = lambda region: np.ascontiguousarray(rgb_frame[region[0]:region[2], region[3]:region[1]])
+
+    locations = []
+    for region in regions:
+        top, _, _, left = region
+        locations.extend((t + top, r + left, b + top, l + left) for t, r, b, l in detect(crop(region)))
+    if roi_mask is not None:
+        locations = [box for box in locations if roi_mask.contains(rgb_frame.shape, box)]
+    return locations
+
+
+def run_pipeline_many(rgb_frames, quality_gate=None, batch_size=32, detector=None, rois=None, skip_boxes=None,
+                      roi_masks=None, landmark_model="small", num_jitters=1, timer=None):
+    """
+    Detection → quality gate → encoding, for several frames.
+    Returns one (locations, encodings, quality) per frame; rejected faces get
+    encoding None and their rejection reason in quality, and never reach the
+    encoder. Chips of all accepted faces of all frames are encoded together.
+    detector defaults to face_recognition's HOG (see face_detectors.py);
+    rois optionally limits detection to motion regions (one list per frame,
+    None = whole frame) and roi_masks to each camera's RoiMask. Faces overlapping skip_boxes (tracks with a fresh
+    identity, one list per frame) are neither gated nor encoded: they come
+    back with encoding None and quality "tracked". landmark_model ("small" =
+    5 points, "large" = 68) aligns the chips; num_jitters > 1 averages
+    randomly jittered copies (slower, slightly more accurate).
+    timer (logger.StageTimer) records detect / quality / align / encode.
+    """
+    detect = detector.detect if detector is not None else face_recognition.face_locations
+    rois = rois or [None] * len(rgb_frames)
+    skip_boxes = skip_boxes or [None] * len(rgb_frames)
+    roi_masks = roi_masks or [None] * len(rgb_frames)
+    detections = []
+    chips = []
+    owners = []  # (frame index, face index) of each chip
+    spent = dict.fromkeys(("detect", "quality", "align"), 0.0)
+    for f, rgb_frame in enumerate(rgb_frames):
+        start = time.perf_counter()
+        locations = detect_in_rois(detect, rgb_frame, rois[f], roi_masks[f])
+        spent["detect"] += time.perf_counter() - start
+        start = time.perf_counter()
+        tracked = match_boxes(locations, skip_boxes[f]) if skip_boxes[f] else {}
+        fresh = [loc for i, loc in enumerate(locations) if i not in tracked]
+        if quality_gate is not None:
+            assessed = iter(quality_gate.assess_image(rgb_frame, fresh))  # Pose below, on the encoder's landmarks
+        else:
+            assessed = iter([None] * len(fresh))
+        quality = ["tracked" if i in tracked else next(assessed) for i in range(len(locations))]
+        detections.append((locations, [None] * len(locations), quality))
+        spent["quality"] += time.perf_counter() - start
+
+        passed = [i for i, reason in enumerate(quality) if reason is None]
+        if not passed:
+            continue
+        start = time.perf_counter()
+        shapes = fr_api._raw_face_landmarks(rgb_frame, [locations[i] for i in passed], model=landmark_model)
+        spent["align"] += time.perf_counter() - start
+        if quality_gate is not None and quality_gate.check_pose:
+            start = time.perf_counter()
+            for i, reason in zip(passed, quality_gate.assess_pose(shapes)):
+                quality[i] = reason
+            shapes = [shape for i, shape in zip(passed, shapes) if quality[i] is None]
+            passed = [i for i in passed if quality[i] is None]
+            spent["quality"] += time.perf_counter() - start
+            if not passed:
+                continue
+        start = time.perf_counter()
+        landmarks = dlib.full_object_detections(shapes)
+        chips.extend(dlib.get_face_chips(rgb_frame, landmarks, size=CHIP_SIZE, padding=CHIP_PADDING))
+        owners.extend((f, i) for i in passed)
+        spent["align"] += time.perf_counter() - start
+
+    start = time.perf_counter()
+    for (f, i), encoding in zip(owners, encode_chips(chips, batch_size, num_jitters)):
+        detections[f][1][i] = encoding
+    if timer is not None:
+        for stage, seconds in spent.items():
+            timer.record(stage, seconds)
+        timer.record("encode", time.perf_counter() - start)
+    return detections
+
+
+def run_pipeline(rgb_frame, quality_gate=None, batch_size=32, detector=None, rois=None, skip_boxes=None,
+                 roi_mask=None, landmark_model="small", num_jitters=1, timer=None):
+    """Single-frame run_pipeline_many → (locations, encodings, quality)"""
+    return run_pipeline_many([rgb_frame], quality_gate, batch_size, detector, [rois], [skip_boxes], [roi_mask],
+                             landmark_model, num_jitters, timer)[0]
+
+
+class LocalEngine:
+    """Detection + encoding in the calling thread (default)"""
+
+    workers = 1
+
+    def __init__(self, quality_gate=None, batch_size=32, detector=None, landmark_model="small", num_jitters=1,
+                 timer=None):
+        self.quality_gate = quality_gate
+        self.batch_size = batch_size
+        self.detector = detector
+        self.landmark_model = landmark_model
+        self.num_jitters = num_jitters
+        self.timer = timer  # StageTimer for detect / quality / align / encode (None = not timed)
+
+    def configure(self, detector=None, landmark_model="small", num_jitters=1):
+        """Switch detector / encoder settings (performance preset) - next frame uses them"""
+        self.detector = detector
+        self.landmark_model = landmark_model
+        self.num_jitters = num_jitters
+
+    def detect_and_encode(self, rgb_frame, rois=None, skip_boxes=None, roi_mask=None):
+        return self.detect_and_encode_many([rgb_frame], [rois], [skip_boxes], [roi_mask])[0]
+
+    def detect_and_encode_many(self, rgb_frames, rois=None, skip_boxes=None, roi_masks=None):
+        """All faces of all frames go through the encoder in shared batches"""
+        return run_pipeline_many(rgb_frames, self.quality_gate, self.batch_size, self.detector, rois, skip_boxes,
+                                 roi_masks, self.landmark_model, self.num_jitters, self.timer)
+
+    def close(self):
+        pass
+
+
+# ---- Process pool worker side ----------------------------------------------
+
+_worker_segments = {}  # Slot index → attached SharedMemory
+_worker_gate = None
+_worker_batch_size = 32
+_worker_detector = None
+_worker_landmark_model = "small"
+_worker_num_jitters = 1
+
+
+def _init_worker(quality_gate=None, batch_size=32, detector=None, landmark_model="small", num_jitters=1):
+    """Runs once per worker process - dlib models are loaded by the module import above"""
+    global _worker_gate, _worker_batch_size, _worker_detector, _worker_landmark_model, _worker_num_jitters
+    _worker_segments.clear()
+    _worker_gate = quality_gate
+    _worker_batch_size = batch_size
+    _worker_detector = detector
+    _worker_landmark_model = landmark_model
+    _worker_num_jitters = num_jitters
+
+
+class _StageDurations(dict):
+    """StageTimer stand-in for a worker process - stage → seconds, sent back with the result"""
+
+    def record(self, stage, seconds):
+        self[stage] = self.get(stage, 0.0) + seconds
+
+
+def _attach(slot, name):
+    """Attach to a parent-owned shared memory slot (cached per worker; a replaced slot drops the old mapping)"""
+    shm = _worker_segments.get(slot)
+    if shm is not None and shm.name != name:
+        shm.close()
+        shm = None
+    if shm is None:
+        # Workers share the parent's resource tracker, so the parent's unlink() cleans up
+        shm = shared_memory.SharedMemory(name=name)
+        _worker_segments[slot] = shm
+    return shm
+
+
+def _detect_and_encode_shared(slot, name, shape, rois=None, skip_boxes=None, roi_mask=None):
+    rgb_frame = np.ndarray(shape, dtype=np.uint8, buffer=_attach(slot, name).buf)
+    durations = _StageDurations()
+    locations, encodings, quality = run_pipeline(rgb_frame, _worker_gate, _worker_batch_size, _worker_detector,
+                                                 rois, skip_boxes, roi_mask, _worker_landmark_model,
+                                                 _worker_num_jitters, durations)
+    del rgb_frame  # No view may outlive the call - the next one may close this mapping
+    encodings = [None if e is None else np.asarray(e, dtype=np.float32) for e in encodings]
+    return locations, encodings, quality, durations
+
+
+# ---- Process pool parent side ----------------------------------------------
+
+class ProcessPoolEngine:
+    """
+    Detection + encoding in a pool of processes (all CPU cores).
+    Frames are copied once into a shared memory slot; only boxes and
+    128-D encodings come back through pickling. Each worker batches the
+    faces of its own frame. A batch reserves all the slots it needs in one
+    step (larger batches go in chunks of at most every slot), so callers on
+    several threads never hold part of the slots while waiting for the rest.
+    Workers report their detect / quality / align / encode time with each
+    result; the parent adds it to timer.
+    """
+
+    def __init__(self, workers=None, frame_shape=(480, 640, 3), quality_gate=None, batch_size=32,
+                 detector=None, landmark_model="small", num_jitters=1, timer=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.slot_bytes = int(np.prod(frame_shape))
+        self._free_slots = []
+        self._slots_cond = threading.Condition()
+        self._all_slots = []
+        for _ in range(self.workers * 2):
+            self._add_slot(self.slot_bytes)
+
+        self.quality_gate = quality_gate
+        self.batch_size = batch_size
+        self.timer = timer  # StageTimer for detect / quality / align / encode (None = not timed)
+        self.pool = self._start_pool(detector, landmark_model, num_jitters)
+        print(f"⚙️ Process pool engine: {self.workers} workers")
+
+    def _start_pool(self, detector, landmark_model, num_jitters):
+        # spawn: no forked copies of camera/audio threads; each worker loads dlib once
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.quality_gate, self.batch_size, detector, landmark_model, num_jitters)
+        )
+
+    def configure(self, detector=None, landmark_model="small", num_jitters=1):
+        """Switch detector / encoder settings - workers are restarted (in-flight frames finish first)"""
+        old_pool = self.pool
+        self.pool = self._start_pool(detector, landmark_model, num_jitters)
+        old_pool.shutdown(wait=True)
+
+    def _add_slot(self, nbytes):
+        shm = shared_memory.SharedMemory(create=True, size=nbytes)
+        self._all_slots.append(shm)
+        self._free_slots.append(shm)
+
+    def _reserve(self, n):
+        """Take n free slots at once (n <= number of slots)"""
+        with self._slots_cond:
+            self._slots_cond.wait_for(lambda: len(self._free_slots) >= n)
+            taken, self._free_slots = self._free_slots[:n], self._free_slots[n:]
+            return taken
+
+    def _release(self, slots):
+        with self._slots_cond:
+            self._free_slots.extend(slots)
+            self._slots_cond.notify_all()
+
+    def _submit(self, rgb_frame, shm, rois=None, skip_boxes=None, roi_mask=None):
+        """Copy a frame into a reserved shared memory slot and queue it → (future, slot actually used)"""
+        rgb_frame = np.ascontiguousarray(rgb_frame, dtype=np.uint8)
+        if shm.size < rgb_frame.nbytes:
+            # Larger frames than configured: replace this slot with a bigger one
+            bigger = shared_memory.SharedMemory(create=True, size=rgb_frame.nbytes)
+            with self._slots_cond:
+                self._all_slots[self._all_slots.index(shm)] = bigger
+            shm.close()
+            shm.unlink()
+            shm = bigger
+
+        with self._slots_cond:
+            slot = self._all_slots.index(shm)
+        np.ndarray(rgb_frame.shape, dtype=np.uint8, buffer=shm.buf)[:] = rgb_frame
+        return self.pool.submit(_detect_and_encode_shared, slot, shm.name, rgb_frame.shape, rois, skip_boxes,
+                                roi_mask), shm
+
+    def detect_and_encode(self, rgb_frame, rois=None, skip_boxes=None, roi_mask=None):
+        """Blocks the calling thread only - the work happens in another process"""
+        return self.detect_and_encode_many([rgb_frame], [rois], [skip_boxes], [roi_mask])[0]
+
+    def detect_and_encode_many(self, rgb_frames, rois=None, skip_boxes=None, roi_masks=None):
+        """Frames of a batch (e.g. several cameras) run in parallel across the pool"""
+        rois = rois or [None] * len(rgb_frames)
+        skip_boxes = skip_boxes or [None] * len(rgb_frames)
+        roi_masks = roi_masks or [None] * len(rgb_frames)
+        all_jobs = list(zip(rgb_frames, rois, skip_boxes, roi_masks))
+        chunk = len(self._all_slots)
+        results = []
+        for start in range(0, len(all_jobs), chunk):
+            jobs = all_jobs[start:start + chunk]
+            slots = self._reserve(len(jobs))
+            futures = []
+            try:
+                for i, (rgb_frame, frame_rois, frame_skip, roi_mask) in enumerate(jobs):
+                    future, slots[i] = self._submit(rgb_frame, slots[i], frame_rois, frame_skip, roi_mask)
+                    futures.append(future)
+                for i, future in enumerate(futures):
+                    locations, encodings, quality, durations = future.result()
+                    results.append((locations, encodings, quality))
+                    if self.timer is not None:
+                        for stage, seconds in durations.items():
+                            self.timer.record(stage, seconds)
+                    self._release([slots[i]])  # Next caller may use it while the rest finish
+                    slots[i] = None
+            finally:
+                wait(futures)  # A slot is only reused once no worker reads it
+                self._release([shm for shm in slots if shm is not None])
+        return results
+
+    def close(self):
+        self.pool.shutdown(wait=True, cancel_futures=True)
+        for shm in self._all_slots:
+            try:
+                shm.close()
+                shm.unlink()
+            except FileNotFoundError:
+                pass
+        self._all_slots = []
+
+
+def make_engine(mode="local", workers=None, frame_shape=(480, 640, 3), quality_gate=None, batch_size=32,
+                detector=None, landmark_model="small", num_jitters=1, timer=None):
+    """Build the engine selected in config (RECOGNITION_ENGINE); timer splits detect / quality / align / encode"""
+    if mode == "local":
+        return LocalEngine(quality_gate, batch_size, detector, landmark_model, num_jitters, timer)
+    if mode == "process":
+        return ProcessPoolEngine(workers, frame_shape, quality_gate, batch_size, detector, landmark_model,
+                                 num_jitters, timer)
+    raise ValueError(f"Unknown recognition engine: {mode}")
+
+
+def benchmark_encoding(image_path, n_faces=64, batch_sizes=(1, 8, 32, 64)):
+    """Per-face face_encodings calls vs batched chip encoding on the faces of one photo"""
+    rgb = face_recognition.load_image_file(image_path)
+    locations = face_recognition.face_locations(rgb)
+    if not locations:
+        print(f"❌ No face in {image_path}")
+        return None
+
+    # Repeat the photo's faces to simulate a crowded batch
+    boxes = (locations * (n_faces // len(locations) + 1))[:n_faces]
+
+    start = time.perf_counter()
+    reference = [face_recognition.face_encodings(rgb, [box])[0] for box in boxes]
+    per_face = time.perf_counter() - start
+    print(f"Per-face calls:   {n_faces / per_face:7.1f} faces/s")
+
+    landmarks = dlib.full_object_detections(fr_api._raw_face_landmarks(rgb, boxes, model="small"))
+    chips = dlib.get_face_chips(rgb, landmarks, size=CHIP_SIZE, padding=CHIP_PADDING)
+    results = {"per_face": n_faces / per_face}
+    for batch_size in batch_sizes:
+        start = time.perf_counter()
+        encodings = encode_chips(chips, batch_size)
+        elapsed = time.perf_counter() - start
+        drift = max(np.linalg.norm(a - b) for a, b in zip(reference, encodings))
+        results[batch_size] = n_faces / elapsed
+        print(f"Batch size {batch_size:3d}:   {n_faces / elapsed:7.1f} faces/s "
+              f"(x{per_face / elapsed:.2f}, max drift {drift:.4f})")
+    return results
+
+
+if __name__ == "__main__":
+    # python recognition_engine.py [photo_with_faces.jpg]
+    if len(sys.argv) > 1:
+        photo = sys.argv[1]
+    else:
+        from config import TRUSTED_FACES_DIR
+        from embedding_cache import list_trusted_photos
+        photos = list_trusted_photos(TRUSTED_FACES_DIR)
+        photo = photos[0][0] if photos else None
+    if photo is None:
+        print("Usage: python recognition_engine.py <photo_with_faces.jpg>")
+    else:
+        benchmark_encoding(photo)
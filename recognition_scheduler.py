@@ -0,0 +1,99 @@
+"""
+Adaptive recognition rate - fast during an intrusion, slow on an empty room
+"""
+import time
+
+MODES = ("alert", "active", "idle", "sleep")
+
+
+class RecognitionScheduler:
+    """
+    Picks each camera's recognition interval from what it has seen lately:
+      alert  - unknown face / siren / conversation
+      active - any face or motion in the last idle_after seconds
+      idle   - quiet for a while
+      sleep  - empty for sleep_after seconds
+    A mode's interval is stretched so recognition stays within its CPU
+    budget (fraction of a core). Mode changes are printed and logged.
+    """
+
+    def __init__(self, intervals, cpu_budgets, idle_after=15.0, sleep_after=120.0,
+                 alert_hold=10.0, logger=None):
+        self.intervals = intervals
+        self.cpu_budgets = cpu_budgets
+        self.idle_after = idle_after
+        self.sleep_after = sleep_after
+        self.alert_hold = alert_hold  # Stay in alert this long after the last unknown face
+        self.logger = logger
+
+        self._last_activity = {}  # source → last face/motion time
+        self._last_unknown = {}  # source → last unknown face time
+        self._forced_alert = {}  # source → siren/conversation active
+        self._cost = {}  # source → EMA of recognition compute seconds per tick
+        self._mode = {}
+        self._start = time.time()
+        self.mode_ticks = {}  # source → {mode: recognitions submitted}
+
+    def observe(self, source, results, compute_time=None, now=None):
+        """Feed one recognition result (RecognitionResult list) and its compute time"""
+        now = now or time.time()
+        if results:
+            self._last_activity[source] = now
+        if any(r.is_unknown for r in results):
+            self._last_unknown[source] = now
+        if compute_time is not None:
+            previous = self._cost.get(source)
+            self._cost[source] = compute_time if previous is None else 0.8 * previous + 0.2 * compute_time
+
+    def note_motion(self, source, now=None):
+        """Motion counts as activity (keeps the camera out of idle/sleep)"""
+        self._last_activity[source] = now or time.time()
+
+    def set_alert(self, source, active):
+        """Siren / conversation in progress → recognize at the alert rate"""
+        self._forced_alert[source] = active
+
+    def mode(self, source, now=None):
+        now = now or time.time()
+        if self._forced_alert.get(source):
+            return "alert", "siren/conversation"
+        if now - self._last_unknown.get(source, -1e9) < self.alert_hold:
+            return "alert", "unknown face"
+
+        quiet = now - self._last_activity.get(source, self._start)
+        if quiet < self.idle_after:
+            return "active", "face or motion"
+        if quiet < self.sleep_after:
+            return "idle", f"quiet {quiet:.0f}s"
+        return "sleep", f"empty {quiet:.0f}s"
+
+    def interval(self, source, now=None):
+        """Seconds to wait between recognitions of this camera right now"""
+        mode, reason = self.mode(source, now)
+        interval = self.intervals[mode]
+        cost = self._cost.get(source)
+        budget = self.cpu_budgets.get(mode)
+        if cost is not None and budget:
+            interval = max(interval, cost / budget)
+
+        if self._mode.get(source) != mode:
+            self._log_change(source, self._mode.get(source), mode, reason, interval)
+            self._mode[source] = mode
+        return interval
+
+    def submitted(self, source):
+        """Count a recognition started in the current mode"""
+        ticks = self.mode_ticks.setdefault(source, dict.fromkeys(MODES, 0))
+        ticks[self._mode.get(source, "active")] += 1
+
+    def _log_change(self, source, old, new, reason, interval):
+        print(f"⏱️ Recognition [{source}]: {old or 'start'} → {new} ({reason}), every {interval:.2f}s")
+        if self.logger is not None:
+            self.logger.log_schedule(source, old, new, reason, interval, self._cost.get(source))
+
+    def metrics(self, source):
+        """Recognitions per mode + current cost estimate"""
+        ticks = self.mode_ticks.get(source, dict.fromkeys(MODES, 0))
+        cost = self._cost.get(source)
+        return {**{f"ticks_{m}": n for m, n in ticks.items()},
+                "compute_ms": float(cost * 1000) if cost is not None else 0.0}
@@ -0,0 +1,145 @@
+"""
+Background face recognition - keeps dlib off the display thread
+"""
+import time
+import threading
+from collections import deque
+import numpy as np
+
+
+class RecognitionPacket:
+    """Results of one recognition tick, tagged with the frame they came from"""
+    __slots__ = ('seq', 'frame', 'results', 'latency', 'compute', 'timestamp')
+
+    def __init__(self, seq, frame, results, latency, compute=None):
+        self.seq = seq
+        self.frame = frame
+        self.results = results
+        self.latency = latency  # Seconds from submit() to published results
+        self.compute = compute  # This frame's share of the batch's recognition time
+        self.timestamp = time.time()
+
+
+class RecognitionWorker:
+    """
+    Shared recognition scheduler for all cameras.
+    Each source has a latest-frame-wins slot; a worker thread takes every
+    pending slot at once and recognizes them as one batch. A source is only
+    in one batch at a time, so its tracker sees frames in order.
+    """
+
+    def __init__(self, recognizer, threads=None, history=200):
+        self.recognizer = recognizer
+        # One thread per engine worker so a process pool can keep several batches in flight
+        self.n_threads = threads or getattr(recognizer.engine, 'workers', 1)
+        self.history = history
+        self._cond = threading.Condition()
+        self._pending = {}  # source → (seq, frame, submit_time, rois) - newer submits overwrite it
+        self._latest = {}  # source → RecognitionPacket
+        self._busy = set()  # Sources in a batch being recognized
+        self._threads = []
+        self.running = False
+
+        # Metrics (per source)
+        self.latencies = {}
+        self.tick_times = {}
+        self.ticks = {}
+        self.dropped = {}
+        self.stale = {}
+        self.batch_sizes = deque(maxlen=history)
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self._threads = [threading.Thread(target=self._run, daemon=True) for _ in range(self.n_threads)]
+        for thread in self._threads:
+            thread.start()
+        print(f"🧠 Recognition worker started ({self.n_threads} thread(s))")
+
+    def stop(self):
+        with self._cond:
+            self.running = False
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join(timeout=5.0)
+        self._threads = []
+
+    def submit(self, frame, seq, source="default", rois=None):
+        """
+        Hand a frame to the worker - never blocks; an unprocessed older frame of
+        the same source is dropped. rois restricts face detection to those regions.
+        """
+        with self._cond:
+            if source in self._pending:
+                self.dropped[source] = self.dropped.get(source, 0) + 1
+            self._pending[source] = (seq, frame, time.perf_counter(), rois)
+            self._cond.notify()
+
+    def latest(self, source="default"):
+        """Most recent published RecognitionPacket for a source (or None)"""
+        return self._latest.get(source)
+
+    def last_latency(self, source="default"):
+        latencies = self.latencies.get(source)
+        return latencies[-1] if latencies else None
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self.running and not self._pending.keys() - self._busy:
+                    self._cond.wait()
+                if not self.running:
+                    return
+                sources = [s for s in self._pending if s not in self._busy]
+                batch = {s: self._pending.pop(s) for s in sources}
+                self._busy.update(sources)
+
+            started = time.perf_counter()
+            try:
+                batch_results = self.recognizer.recognize_batch([batch[s][1] for s in sources],
+                                                                [batch[s][3] for s in sources], sources)
+            except Exception as e:
+                print(f"⚠️ Recognition error: {e}")
+                batch_results = None
+
+            done = time.perf_counter()
+            compute = (done - started) / len(sources)
+            with self._cond:
+                self._busy.difference_update(sources)
+                self._cond.notify_all()  # Their newer frames may go to any thread now
+                if batch_results is None:
+                    continue
+                self.batch_sizes.append(len(sources))
+                for source, results in zip(sources, batch_results):
+                    seq, frame, submitted, _ = batch[source]
+                    latency = done - submitted
+                    self.latencies.setdefault(source, deque(maxlen=self.history)).append(latency)
+                    self.tick_times.setdefault(source, deque(maxlen=self.history)).append(done)
+                    self.ticks[source] = self.ticks.get(source, 0) + 1
+
+                    latest = self._latest.get(source)
+                    if latest is not None and latest.seq > seq:
+                        self.stale[source] = self.stale.get(source, 0) + 1
+                        continue
+                    self._latest[source] = RecognitionPacket(seq, frame, results, latency, compute)
+
+    def metrics(self, source="default"):
+        """Recognition latency (ms) and rate (ticks/s) for one source"""
+        with self._cond:
+            latencies = list(self.latencies.get(source, ()))
+            tick_times = list(self.tick_times.get(source, ()))
+
+        lat = np.array(latencies) * 1000 if latencies else np.zeros(1)
+        rate = (len(tick_times) - 1) / (tick_times[-1] - tick_times[0]) if len(tick_times) > 1 else 0.0
+        return {
+            "ticks": self.ticks.get(source, 0),
+            "dropped_frames": self.dropped.get(source, 0),
+            "stale_results": self.stale.get(source, 0),
+            "recognition_rate_hz": float(rate),
+            "last_ms": float(lat[-1]),
+            "mean_ms": float(lat.mean()),
+            "p50_ms": float(np.percentile(lat, 50)),
+            "p95_ms": float(np.percentile(lat, 95)),
+            "mean_batch_size": float(np.mean(self.batch_sizes)) if self.batch_sizes else 0.0,
+        }
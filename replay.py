@@ -0,0 +1,153 @@
+"""
+Replay a recorded incident through the recognition pipeline - FPS and per-stage timings, no webcam needed
+Usage: python replay.py <video|frames_dir> [--pacing fast|realtime] [--preset eco] [--every N] [--json out.json]
+                        [--db-dir intruder_database]
+"""
+import os
+import json
+import time
+import shutil
+import argparse
+import tempfile
+from collections import Counter
+
+from config import (TRUSTED_FACES_DIR, INTRUDER_DB_DIR, EMBEDDING_CACHE_FILE, FACE_TOLERANCE, FACE_INDEX_MODE,
+                    FACE_INDEX_NPROBE, FRAME_WIDTH, FRAME_HEIGHT, FRAME_RING_SIZE, ENCODING_BATCH_SIZE,
+                    QUALITY_GATE_ENABLED, MIN_FACE_SIZE, MIN_FACE_SHARPNESS, FACE_EXPOSURE_RANGE, MAX_FACE_YAW,
+                    FACE_TRACKING, TRACK_MAX_AGE, TRACK_REVERIFY_INTERVAL, TRACK_VOTES, MOTION_GATING,
+                    MOTION_WIDTH, MOTION_THRESHOLD, MOTION_MIN_AREA)
+from camera_manager import CameraManager
+from face_quality import FaceQualityGate
+from face_recognizer import FaceRecognizer
+from face_tracker import FaceTracker
+from logger import StageTimer
+from motion_detector import MotionDetector
+from presets import preset_settings, build_detector
+from recognition_engine import LocalEngine
+
+
+def scratch_paths(db_dir=None):
+    """
+    (scratch dir, intruder database dir, embedding cache file) for offline runs.
+    Trusted photos are read from TRUSTED_FACES_DIR, but the embedding cache is
+    a copy and the intruder database is empty - nothing touches the live store
+    unless db_dir names it. The caller removes the scratch dir.
+    """
+    scratch = tempfile.mkdtemp(prefix="guard_offline_")
+    cache_file = os.path.join(scratch, os.path.basename(EMBEDDING_CACHE_FILE))
+    if os.path.exists(EMBEDDING_CACHE_FILE):
+        shutil.copy2(EMBEDDING_CACHE_FILE, cache_file)
+    return scratch, db_dir or os.path.join(scratch, "intruder_database"), cache_file
+
+
+def replay(source, pacing="fast", preset=None, every=1, motion=MOTION_GATING, tracking=FACE_TRACKING, db_dir=None):
+    """
+    Play a video / frame directory through camera → motion → recognition like
+    the guard does (without conversation, alerts or display) → summary dict.
+    Every `every`-th frame is recognized; with motion gating, still frames
+    without faces in view are skipped as in the live loop. The intruder
+    database is a scratch copy unless db_dir is given.
+    """
+    scratch, db_dir, cache_file = scratch_paths(db_dir)
+    stages = StageTimer()
+    settings = preset_settings(preset)
+    gate = FaceQualityGate(MIN_FACE_SIZE, MIN_FACE_SHARPNESS, FACE_EXPOSURE_RANGE, MAX_FACE_YAW) \
+        if QUALITY_GATE_ENABLED else None
+    engine = LocalEngine(gate, ENCODING_BATCH_SIZE, build_detector(settings), settings["landmark_model"],
+                         settings["num_jitters"], timer=stages)
+    recognizer = FaceRecognizer(TRUSTED_FACES_DIR, db_dir, FACE_TOLERANCE, cache_file=cache_file,
+                                index_mode=FACE_INDEX_MODE, n_probe=FACE_INDEX_NPROBE, engine=engine,
+                                tracker_factory=(lambda: FaceTracker(TRACK_MAX_AGE, TRACK_REVERIFY_INTERVAL,
+                                                                     TRACK_VOTES)) if tracking else None,
+                                timer=stages)
+    detector = MotionDetector(MOTION_WIDTH, MOTION_THRESHOLD, min_area=MOTION_MIN_AREA) if motion else None
+    name = os.path.basename(os.path.normpath(source))
+    camera = CameraManager(source, FRAME_WIDTH, FRAME_HEIGHT, name=name, ring_size=FRAME_RING_SIZE, pacing=pacing)
+
+    frames = recognized = faces = 0
+    identities = Counter()
+    results = []
+    seq = 0
+    camera.start()
+    start = time.perf_counter()
+    try:
+        while True:
+            with stages.stage("capture"):
+                latest = camera.wait_for_frame(seq, timeout=1.0)
+            if latest is None:
+                if camera.finished:
+                    break
+                continue
+            seq, _, frame = latest
+            frames += 1
+
+            moving = None
+            if detector is not None:
+                with stages.stage("motion"):
+                    moving = detector.detect(frame)
+            if (frames - 1) % every or (moving is not None and not moving.moving and not results):
+                continue
+
+            rois = moving.rois if moving is not None and moving.moving and not results else None
+            with stages.stage("recognize"):
+                results = recognizer.recognize_faces(frame, rois, source=name)
+            recognized += 1
+            faces += len(results)
+            identities.update(result.name for result in results)
+    finally:
+        wall = time.perf_counter() - start
+        camera.stop()
+        recognizer.close()
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    timings = stages.summary()
+    recognize_s = timings.get("recognize", {}).get("total_s", 0.0)
+    return {
+        "source": source,
+        "pacing": pacing,
+        "preset": preset or "custom",
+        "frames": frames,
+        "dropped": camera.seq - frames,  # Realtime pacing only - the pipeline fell behind the recording
+        "recognized": recognized,
+        "faces": faces,
+        "wall_s": wall,
+        "fps": frames / wall if wall > 0 else 0.0,
+        "recognition_fps": recognized / recognize_s if recognize_s > 0 else 0.0,
+        "identities": dict(identities),
+        "stages": timings,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay a recording through the recognition pipeline")
+    parser.add_argument("source", help="Video file or directory of frames")
+    parser.add_argument("--pacing", choices=("fast", "realtime"), default="fast",
+                        help="fast = every frame, as fast as possible; realtime = recorded FPS, drops like a camera")
+    parser.add_argument("--preset", default=None, help="Performance preset (default: config.py values)")
+    parser.add_argument("--every", type=int, default=1, help="Recognize every N-th frame")
+    parser.add_argument("--no-motion", action="store_true", help="Recognize frames even without motion")
+    parser.add_argument("--no-tracking", action="store_true", help="Encode every face on every pass")
+    parser.add_argument("--json", default=None, help="Write the summary here (track FPS across releases)")
+    parser.add_argument("--db-dir", default=None,
+                        help=f"Intruder database to match against, e.g. {INTRUDER_DB_DIR} (default: empty scratch database)")
+    args = parser.parse_args()
+
+    summary = replay(args.source, args.pacing, args.preset, max(1, args.every), not args.no_motion,
+                     not args.no_tracking, args.db_dir)
+
+    print("\n" + "="*60)
+    print(f"REPLAY: {summary['source']} ({summary['pacing']}, preset {summary['preset']})")
+    print("="*60)
+    print(f"Frames: {summary['frames']} in {summary['wall_s']:.1f}s ({summary['fps']:.1f} FPS), "
+          f"{summary['dropped']} dropped")
+    print(f"Recognized: {summary['recognized']} frames ({summary['recognition_fps']:.1f}/s), "
+          f"{summary['faces']} faces {summary['identities']}")
+    for stage, t in summary["stages"].items():
+        print(f"{stage:>14}: {t['count']:6d} x  mean {t['mean_ms']:7.2f}  p50 {t['p50_ms']:7.2f}  "
+              f"p95 {t['p95_ms']:7.2f}  max {t['max_ms']:7.2f} ms")
+    print("="*60)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(summary, f, indent=2)
+        print(f"✅ Replay summary saved: {args.json}")
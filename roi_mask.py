@@ -0,0 +1,78 @@
+"""
+Per-camera region-of-interest masks - faces outside the polygons are never searched for
+"""
+import cv2
+import numpy as np
+
+
+class RoiMask:
+    """
+    One or more polygons in fractions of the frame ([x, y] with 0..1), so the
+    same config works at any resolution. Rasterized masks are cached per
+    frame shape; only the polygons are pickled to worker processes.
+    """
+
+    def __init__(self, polygons):
+        if polygons and not isinstance(polygons[0][0], (list, tuple)):
+            polygons = [polygons]  # A single polygon
+        self.polygons = [np.asarray(p, dtype=np.float32).reshape(-1, 2) for p in polygons]
+        self._cache = {}
+
+    def __getstate__(self):
+        return {'polygons': self.polygons, '_cache': {}}
+
+    def _raster(self, shape):
+        """(full-frame mask, bounding box) for a frame shape"""
+        height, width = shape[:2]
+        cached = self._cache.get((height, width))
+        if cached is None:
+            mask = np.zeros((height, width), np.uint8)
+            points = [np.round(p * (width, height)).astype(np.int32) for p in self.polygons]
+            cv2.fillPoly(mask, points, 1)
+            ys, xs = np.nonzero(mask)
+            bbox = (int(ys.min()), int(xs.max()) + 1, int(ys.max()) + 1, int(xs.min())) if len(xs) else None
+            cached = self._cache[(height, width)] = (mask, bbox)
+        return cached
+
+    def mask(self, shape):
+        return self._raster(shape)[0]
+
+    def coverage(self, shape):
+        """Fraction of the frame inside the ROI"""
+        return float(self.mask(shape).mean())
+
+    def regions(self, shape, rois=None):
+        """Detection regions clipped to the ROI bounding box (rois=None → the bounding box itself)"""
+        bbox = self._raster(shape)[1]
+        if bbox is None:
+            return []
+        if rois is None:
+            return [bbox]
+        clipped = []
+        for top, right, bottom, left in rois:
+            box = (max(top, bbox[0]), min(right, bbox[1]), min(bottom, bbox[2]), max(left, bbox[3]))
+            if box[2] > box[0] and box[1] > box[3]:
+                clipped.append(box)
+        return clipped
+
+    def crop(self, rgb_frame, region):
+        """Region of the frame with pixels outside the polygons blacked out"""
+        top, right, bottom, left = region
+        crop = rgb_frame[top:bottom, left:right]
+        inside = self.mask(rgb_frame.shape)[top:bottom, left:right]
+        return np.where(inside[..., None].astype(bool), crop, 0).astype(rgb_frame.dtype)
+
+    def contains(self, shape, box):
+        """Whether a face box is centred inside the ROI"""
+        top, right, bottom, left = box
+        mask = self.mask(shape)
+        y = min(max((top + bottom) // 2, 0), mask.shape[0] - 1)
+        x = min(max((left + right) // 2, 0), mask.shape[1] - 1)
+        return bool(mask[y, x])
+
+    def draw(self, frame, color=(255, 255, 0)):
+        """Outline the ROI on a display frame"""
+        height, width = frame.shape[:2]
+        points = [np.round(p * (width, height)).astype(np.int32) for p in self.polygons]
+        cv2.polylines(frame, points, True, color, 1)
+        return frame
@@ -101,6 +101,72 @@ class EmergencySiren:
         
         return amp
     
+    def _mode_pattern(self, mode_name):
+        """(base freq, frequency modulation, tremolo rate, tremolo depth) of one mode, slightly varied each cycle"""
+        if mode_name == 'yelp':
+            low = 700.0 + random.uniform(-20, 20)
+            high = 1200.0 + random.uniform(-30, 30)
+            alternation_hz = 6.5 + random.uniform(-0.5, 0.5)
+            
+            def freq_mod(t_array):
+                phase = 2.0 * np.pi * alternation_hz * t_array
+                smooth = 0.5 * (1 + np.sin(phase))
+                return low * (1 - smooth) + high * smooth
+        
+        elif mode_name == 'wail':
+            low = 600.0 + random.uniform(-30, 30)
+            high = 1400.0 + random.uniform(-40, 40)
+            sweep_hz = 0.35 + random.uniform(-0.05, 0.05)
+            
+            def freq_mod(t_array):
+                lfo = 0.5 * (1 + np.sin(2.0 * np.pi * sweep_hz * t_array))
+                return low * (1 - lfo) + high * lfo
+        
+        else:
+            low = 650.0
+            high = 1250.0
+            sweep_hz = 0.5
+            
+            def freq_mod(t_array):
+                lfo = 0.5 * (1 + np.sin(2.0 * np.pi * sweep_hz * t_array))
+                return low * (1 - lfo) + high * lfo
+        
+        tremolo_rate = 7.0 + random.uniform(-1.0, 1.0)
+        tremolo_depth = 0.12 + random.uniform(-0.03, 0.03)
+        return low, freq_mod, tremolo_rate, tremolo_depth
+    
+    def _render_chunk(self, pattern, t0, elapsed_mode, mode_dur):
+        """One output chunk: siren tone + tremolo + envelope + volume → float32 samples"""
+        low, freq_mod, tremolo_rate, tremolo_depth = pattern
+        samples = self._siren_chunk(low, freq_mod, t0)
+        
+        n = samples.size
+        t_chunk = (np.arange(n) / self.sample_rate) + t0
+        trem = 1.0 - tremolo_depth * (0.5 * (1 + np.sin(2.0 * np.pi * tremolo_rate * t_chunk)))
+        samples = samples * trem
+        
+        amp_env = self._amplitude_envelope(elapsed_mode, mode_dur)
+        micro = 1.0 + random.uniform(-0.01, 0.01)
+        samples = samples * self.volume * amp_env * micro
+        
+        return np.clip(samples, -1.0, 1.0).astype(np.float32)
+    
+    def generate(self, seconds=1.0):
+        """Render `seconds` of the siren loop offline (no audio device) → float32 samples - same chunks as playback"""
+        chunks = []
+        t = 0.0
+        while t < seconds:
+            for mode_name, mode_dur in self.mode_sequence:
+                pattern = self._mode_pattern(mode_name)
+                elapsed_mode = 0.0
+                while elapsed_mode < mode_dur and t < seconds:
+                    chunks.append(self._render_chunk(pattern, t, elapsed_mode, mode_dur))
+                    elapsed_mode += self.chunk_duration
+                    t += self.chunk_duration
+                if t >= seconds:
+                    break
+        return np.concatenate(chunks)
+    
     def _play_loop(self):
         """Main continuous loop"""
         sr = self.sample_rate
@@ -128,55 +194,13 @@ class EmergencySiren:
                     mode_start = time.time()
                     
                     # Configure pattern
-                    if mode_name == 'yelp':
-                        low = 700.0 + random.uniform(-20, 20)
-                        high = 1200.0 + random.uniform(-30, 30)
-                        alternation_hz = 6.5 + random.uniform(-0.5, 0.5)
-                        
-                        def freq_mod(t_array):
-                            phase = 2.0 * np.pi * alternation_hz * t_array
-                            smooth = 0.5 * (1 + np.sin(phase))
-                            return low * (1 - smooth) + high * smooth
-                    
-                    elif mode_name == 'wail':
-                        low = 600.0 + random.uniform(-30, 30)
-                        high = 1400.0 + random.uniform(-40, 40)
-                        sweep_hz = 0.35 + random.uniform(-0.05, 0.05)
-                        
-                        def freq_mod(t_array):
-                            lfo = 0.5 * (1 + np.sin(2.0 * np.pi * sweep_hz * t_array))
-                            return low * (1 - lfo) + high * lfo
-                    
-                    else:
-                        low = 650.0
-                        high = 1250.0
-                        sweep_hz = 0.5
-                        
-                        def freq_mod(t_array):
-                            lfo = 0.5 * (1 + np.sin(2.0 * np.pi * sweep_hz * t_array))
-                            return low * (1 - lfo) + high * lfo
-                    
-                    tremolo_rate = 7.0 + random.uniform(-1.0, 1.0)
-                    tremolo_depth = 0.12 + random.uniform(-0.03, 0.03)
+                    pattern = self._mode_pattern(mode_name)
                     
                     # Generate chunks for this mode
                     while (time.time() - mode_start) < mode_dur and not self._stop_flag.is_set():
                         t0 = time.time() - epoch
-                        samples = self._siren_chunk(low, freq_mod, t0)
-                        
-                        n = samples.size
-                        t_chunk = (np.arange(n) / sr) + t0
-                        trem = 1.0 - tremolo_depth * (0.5 * (1 + np.sin(2.0 * np.pi * tremolo_rate * t_chunk)))
-                        samples = samples * trem
-                        
-                        elapsed_mode = time.time() - mode_start
-                        amp_env = self._amplitude_envelope(elapsed_mode, mode_dur)
-                        
-                        micro = 1.0 + random.uniform(-0.01, 0.01)
-                        samples = samples * self.volume * amp_env * micro
-                        
-                        samples = np.clip(samples, -1.0, 1.0)
-                        stream.write(samples.astype(np.float32).tobytes())
+                        samples = self._render_chunk(pattern, t0, time.time() - mode_start, mode_dur)
+                        stream.write(samples.tobytes())
                 
                 # ✅ Loop continues until stop_flag is set
         
@@ -1,6 +1,7 @@
 """
 System state management
 """
+import time
 
 class StateManager:
     """Manage guard system state"""
@@ -33,3 +34,56 @@ class StateManager:
         self.conversation_active = False
         self.intruder_detected = False
         print("💬 Conversation ENDED")
+
+
+class RoomState:
+    """Per-camera monitoring state (one escalation state machine per room)"""
+    
+    def __init__(self, name, camera, window_name=None, motion=None, roi_mask=None, evidence=None):
+        self.name = name
+        self.camera = camera
+        self.window_name = window_name or f"AI Room Guard - {name}"
+        self.motion = motion  # MotionDetector (None = recognize every scheduled tick)
+        self.roi_mask = roi_mask  # RoiMask (None = whole frame)
+        self.evidence = evidence  # EvidenceBuffer (None = still photos only)
+        
+        # Recognition
+        self.frame = None
+        self.frame_seq = 0
+        self.camera_seq = 0  # Last camera ring sequence number shown
+        self.last_check_time = time.time()
+        self.last_result_seq = 0
+        self.results = []
+        self.recognized_frame = None
+        self.last_full_check = 0.0  # Last whole-frame recognition (motion gating re-checks periodically)
+        self.motion_skips = 0
+        
+        # Display FPS
+        self.fps = 0.0
+        self._fps_frames = 0
+        self._fps_start = time.time()
+        
+        self.siren_active = False
+        self.reset()
+    
+    def reset(self):
+        """Forget the current intruder (trusted person seen / room clear)"""
+        self.unknown_count = 0
+        self.consecutive_unknown = 0
+        self.in_conversation = False
+        self.waiting_for_response = False
+        self.intruder_encoding = None
+        self.intruder_frame = None  # Recognized frame (own copy) the intruder encoding came from
+        self.intruder_added = False
+        self.current_intruder_id = None
+        self.empty_since = None  # When the room was first seen empty while the siren sounds
+    
+    def tick(self):
+        """Count a displayed frame; FPS is refreshed once per second"""
+        self.frame_seq += 1
+        self._fps_frames += 1
+        elapsed = time.time() - self._fps_start
+        if elapsed >= 1.0:
+            self.fps = self._fps_frames / elapsed
+            self._fps_frames = 0
+            self._fps_start = time.time()
@@ -0,0 +1,64 @@
+"""
+Live enrollment - watches trusted_faces/ for added, changed and removed photos
+"""
+import os
+import threading
+
+from embedding_cache import list_trusted_photos
+
+
+class TrustedFacesWatcher:
+    """
+    Polls the directory tree's (size, mtime) snapshot - a few stat calls per interval,
+    no extra dependency - and asks the recognizer to reload when it changes.
+    """
+
+    def __init__(self, recognizer, interval=2.0):
+        self.recognizer = recognizer
+        self.interval = interval
+        self._stop_flag = threading.Event()
+        self._thread = None
+        self._snapshot = self._scan()
+
+    def _scan(self):
+        snapshot = {}
+        for path, _ in list_trusted_photos(self.recognizer.trusted_dir):
+            try:
+                st = os.stat(path)
+                snapshot[path] = (st.st_size, st.st_mtime_ns)
+            except OSError:
+                pass  # Deleted between listing and stat
+        return snapshot
+
+    def start(self):
+        self._stop_flag.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        print(f"👀 Watching {self.recognizer.trusted_dir}/ for new trusted faces")
+
+    def stop(self):
+        self._stop_flag.set()
+        if self._thread:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop_flag.wait(self.interval):
+            snapshot = self._scan()
+            if snapshot == self._snapshot:
+                continue
+
+            added = snapshot.keys() - self._snapshot.keys()
+            removed = self._snapshot.keys() - snapshot.keys()
+            changed = {n for n in snapshot.keys() & self._snapshot.keys() if snapshot[n] != self._snapshot[n]}
+            print(f"👀 Trusted faces changed: +{len(added)} ~{len(changed)} -{len(removed)}")
+
+            # Give copies in progress a moment to finish before encoding
+            if self._stop_flag.wait(0.5) or self._scan() != snapshot:
+                continue
+
+            try:
+                self.recognizer.reload_trusted_faces()
+                self._snapshot = snapshot
+            except Exception as e:
+                print(f"⚠️ Trusted faces reload failed: {e}")
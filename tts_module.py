@@ -35,6 +35,17 @@ class TextToSpeech:
                 print(f"⚠️ TTS error: {e}")
                 self.speaking = False
     
+    def synthesize(self, text, path):
+        """Render speech to an audio file instead of the speakers → path"""
+        with self._lock:
+            engine = pyttsx3.init()
+            engine.setProperty('rate', self.rate)
+            engine.setProperty('volume', self.volume)
+            engine.save_to_file(text, path)
+            engine.runAndWait()
+            engine.stop()
+        return path
+    
     def speak_async(self, text):
         """Non-blocking speech"""
         thread = threading.Thread(target=self.speak, args=(text,), daemon=True)